@@ -75,3 +75,8 @@ class AnonymousSystem:
             await canal_logs.send(embed=embed_log, files=archivos)
 
             await ctx.message.delete()
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload anonymous_system)"""
+    bot.systems['anonymous'] = AnonymousSystem(bot)
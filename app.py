@@ -4,76 +4,65 @@ import os
 import asyncio
 import json
 from datetime import datetime
-from keep_alive import keep_alive
-
-# Sistemas base
-from bot_commands import BotCommands
-from whitelist_system import WhitelistSystem
-from reaction_logger import ReactionLogger
-from warn_system import WarnSystem
-from job_system import JobSystem
-from rating_system import RatingSystem
-from suggestion_system import SuggestionSystem
-from warning_system import WarningSystem
-from staff_accept_system import StaffAcceptSystem
-from activity_check_system import ActivityCheckSystem
-from auto_warning_system import AutoWarningSystem
-from anonymous_system import AnonymousSystem
-from register_instagram import InstagramSystem
-from historial_user import HistorialUser
-from system_ck import CKSystem
-from whitelist_schedule_system import WhitelistScheduleSystem
-from global_ban_system import GlobalBanSystem
-from radio_system import RadioSystem
+from keep_alive import keep_alive, stop_keep_alive
+from bot_logging import setup_logging, stop_logging, get_logger
+
+# Los sistemas se cargan como extensiones (ver extension_manager.EXTENSIONS)
+from extension_manager import ExtensionManager, configured_extensions
+from cache_policy import cache_options, CacheReport
+from command_metrics import CommandMetrics
+from command_sync import CommandSync
+from permissions import PermissionIndex, STAFF
 # Eliminar el sistema de autoayuda
 # from ticket_autohelp_system import TicketAutoHelpSystem
 
-# Configuración del bot
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix='pc!', intents=intents)
-
-# Inicialización de sistemas
-bot_commands = BotCommands(bot)
-whitelist_system = WhitelistSystem(bot)
-reaction_logger = ReactionLogger(bot)
-warn_system = WarnSystem(bot)
-job_system = JobSystem(bot)
-rating_system = RatingSystem(bot)
-suggestion_system = SuggestionSystem(bot)
-warning_system = WarningSystem(bot)
-staff_accept_system = StaffAcceptSystem(bot)
-activity_check_system = ActivityCheckSystem(bot)
-auto_warning_system = AutoWarningSystem(bot, warning_system)
-instagram_system = InstagramSystem(bot)
-anonymous_system = AnonymousSystem(bot)
-historial_user = HistorialUser(bot)
-ck_system = CKSystem(bot)
-whitelist_schedule_system = WhitelistScheduleSystem(bot)
-global_ban_system = GlobalBanSystem(bot)
-radio_system = RadioSystem(bot)
+# Logging en un hilo aparte para no bloquear el event loop
+setup_logging()
+logger = get_logger('main')
+message_logger = get_logger('messages')  # alto volumen, muestreado
+
+# Configuración del bot: intents y cachés según las extensiones configuradas
+bot_options = cache_options(configured_extensions())
+bot = commands.Bot(command_prefix='pc!', **bot_options)
+bot.permissions = PermissionIndex(bot)  # capacidades por miembro, ver permissions.ROLE_CAPABILITIES
+
+# Los sistemas se cargan en main() y se recargan con pc!reload <sistema>
+extension_manager = ExtensionManager(bot)
+command_metrics = CommandMetrics(bot)
+command_sync = CommandSync(bot)
+cache_report = CacheReport(bot, bot_options)
 # Eliminar la inicialización de TicketAutoHelpSystem
 # ticket_autohelp_system = TicketAutoHelpSystem(bot)
 
 # Eliminar comando de ayuda por defecto
 bot.remove_command('help')
 
+startup_done = False  # on_ready ya inicializó el bot
+
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} ha iniciado sesión y está listo!')
-    print(f'Bot ID: {bot.user.id}')
+    logger.info(f'{bot.user} ha iniciado sesión y está listo!')
+    logger.info(f'Bot ID: {bot.user.id}')
     await bot.change_presence(status=discord.Status.dnd,
                               activity=discord.Game(name="Puro Chile RP"))
 
+    # on_ready se repite en cada reconexión al gateway, lo de abajo solo corre la primera vez
+    global startup_done
+    if startup_done:
+        logger.info("Reconectado al gateway, se omite la inicialización")
+        return
+    startup_done = True
+
     try:
-        synced = await bot.tree.sync()
-        print(f'Sincronizados {len(synced)} comandos slash')
+        await command_sync.sync()  # solo si el árbol de comandos cambió, pc!sync la fuerza
     except Exception as e:
-        print(f'Error sincronizando comandos: {e}')
+        logger.error(f'Error sincronizando comandos: {e}')
 
     await register_persistent_views()
-    whitelist_schedule_system.start_schedule_system()
-    print(
+    if 'whitelist_schedule' in bot.systems:
+        bot.systems['whitelist_schedule'].start_schedule_system()
+    logger.info(
         "🔧 Sistema de Auto-Ayuda: MODO MANTENIMIENTO - Solo comandos disponibles"
     )
 
@@ -81,7 +70,12 @@ async def on_ready():
 @bot.event
 async def on_message(message):
     if not message.author.bot:
-        print(f"Mensaje recibido: '{message.content}' de {message.author}")
+        message_logger.info("Mensaje recibido",
+                            extra={
+                                "author_id": message.author.id,
+                                "channel_id": message.channel.id,
+                                "length": len(message.content)
+                            })
     await bot.process_commands(message)
 
 
@@ -109,14 +103,14 @@ async def on_command_error(ctx, error):
             "Discord está teniendo problemas técnicos, intenta de nuevo más tarde.",
             color=discord.Color.orange())
         await ctx.send(embed=embed)
-        print(f"Error de servidor Discord: {error}")
+        logger.error(f"Error de servidor Discord: {error}")
 
     else:
         embed = discord.Embed(title="❌ Error no manejado",
                               description=f"Ocurrió un error: {str(error)}",
                               color=discord.Color.red())
         await ctx.send(embed=embed)
-        print(f"Error no manejado: {error}")
+        logger.error(f"Error no manejado: {error}")
 
 
 @bot.command(name='ping')
@@ -130,10 +124,7 @@ async def ping(ctx):
 
 @bot.command(name='ayuda')
 async def help_command(ctx):
-    staff_role_id = 1221496580620816473
-    is_staff = any(role.id == staff_role_id for role in ctx.author.roles)
-
-    if is_staff:
+    if bot.permissions.has(ctx.author, STAFF):
         embed = discord.Embed(
             title="👑 Comandos de Staff - Puro Chile RP",
             description="Lista completa de comandos administrativos",
@@ -175,7 +166,12 @@ async def help_command(ctx):
         embed.add_field(
             name="🛠️ Herramientas Administrativas",
             value="💀 `pc!ck` (Sistema CK)\n"
-            "🎯 `/verwhitelist @usuario` (Ver respuestas completas)",
+            "🎯 `/verwhitelist @usuario` (Ver respuestas completas)\n"
+            "⏱️ `pc!perf` (Comandos más lentos de la última hora)\n"
+            "🔄 `pc!reload [sistema]` (Recargar un sistema sin reiniciar)\n"
+            "🧩 `pc!extensiones` (Estado y carga de los sistemas)\n"
+            "📡 `pc!sync` (Forzar sincronización de comandos slash)\n"
+            "🧠 `pc!mem` (Tamaño de cachés y memoria)",
             inline=False)
 
         embed.add_field(
@@ -268,37 +264,22 @@ async def register_persistent_views():
     """Registrar todas las vistas persistentes para que funcionen después de reiniciar el bot"""
     try:
         # Importar las vistas que necesitan ser persistentes
-        from suggestion_system import SuggestionVotingView
+        # (las de whitelist, sugerencias y radios las registra el setup() de su extensión)
         from activity_check_system import ActivityCheckView
         from utils.views import EntornoView
-        from radio_system import RadioView
-        from whitelist_system import RobloxVerificationView, WhitelistReviewView
         from system_ck import CKView
 
         # Registrar vistas persistentes genéricas (sin datos específicos)
-        bot.add_view(SuggestionVotingView(author_id=0))  # ID temporal
         bot.add_view(ActivityCheckView(required_votes=0,
                                        admin_id=0))  # Valores temporales
         bot.add_view(EntornoView(bot))
-        bot.add_view(RadioView(creator_id=0, radio_name="",
-                               voice_channel=None))  # Valores temporales
-
-        # Registrar vistas del sistema de whitelist
-        bot.add_view(
-            RobloxVerificationView(
-                user_id=0, whitelist_system=whitelist_system))  # ID temporal
-        bot.add_view(
-            WhitelistReviewView(user_id=0,
-                                channel_id=0,
-                                whitelist_system=whitelist_system,
-                                roblox_info={}))  # Valores temporales
 
         # Registrar vistas del sistema de CK
         bot.add_view(CKView(user_id=0, bot=bot))  # ID temporal
 
-        print("✅ Vistas persistentes registradas correctamente")
+        logger.info("✅ Vistas persistentes registradas correctamente")
     except Exception as e:
-        print(f"❌ Error registrando vistas persistentes: {e}")
+        logger.error(f"❌ Error registrando vistas persistentes: {e}")
 
 
 async def init_data_directories():
@@ -317,24 +298,49 @@ async def init_data_directories():
             json.dump([], f)
 
 
-async def main():
-    await init_data_directories()
-    await rating_system.init_database()
-    keep_alive()
+def working_set(system, attribute):
+    """Tamaño de una colección de un sistema, None si su extensión no está cargada"""
+    def size():
+        instance = bot.systems.get(system)
+        return len(getattr(instance, attribute)) if instance is not None else None
+    return size
+
 
+async def main():
     token = os.getenv('DISCORD_BOT_TOKEN')
     if not token:
-        print(
+        logger.error(
             "❌ Error: DISCORD_BOT_TOKEN no encontrado en las variables de entorno"
         )
+        stop_logging()
         return
 
+    await init_data_directories()
+    await extension_manager.load_all()  # rating_system inicializa su base de datos en setup()
+    runner = await keep_alive(  # aiohttp en el mismo event loop que el bot, sin hilo extra
+        bot,
+        working_sets={
+            "active_radios": working_set('radio', 'active_radios'),
+            "whitelist_user_channels": working_set('whitelist', 'user_channels'),
+            "pending_verifications": working_set('whitelist', 'pending_verifications'),
+            "instagram_profiles": working_set('instagram', 'instagram_profiles'),
+            "cached_members": lambda: cache_report.sizes()["members"],
+            "cached_messages": lambda: len(bot.cached_messages),
+            "permission_index": lambda: len(bot.permissions.index)
+        },
+        metrics=command_metrics)
+
     try:
         await bot.start(token)
     except discord.LoginFailure:
-        print("❌ Error: Token de bot inválido")
+        logger.error("❌ Error: Token de bot inválido")
     except Exception as e:
-        print(f"❌ Error iniciando el bot: {e}")
+        logger.error(f"❌ Error iniciando el bot: {e}")
+    finally:
+        # También al cancelar main() con Ctrl+C: bot.start() no cierra el bot por sí solo
+        await bot.close()  # no hace nada si ya estaba cerrado
+        await stop_keep_alive(runner)
+        stop_logging()  # escribir lo que quede en la cola
 
 
 if __name__ == '__main__':
@@ -0,0 +1,35 @@
+"""Measures the per-request cost of the in-memory revocation check.
+
+Usage: python -m benchmarks.blocklist_check [revoked_tokens]
+"""
+from core.blocklist import TokenBlocklist
+from datetime import datetime, timedelta
+from uuid import uuid4
+import sys
+import time
+import timeit
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    # No refresh during the run, we only want the lookup itself
+    blocklist = TokenBlocklist(refresh_interval=float('inf'))
+    blocklist._last_refresh = time.monotonic()
+
+    exp = datetime.utcnow() + timedelta(minutes=15)
+    jtis = [str(uuid4()) for _ in range(size)]
+    for jti in jtis:
+        blocklist._revoked[jti] = exp
+
+    hit = jtis[size // 2]
+    miss = str(uuid4())
+    number = 1000000
+
+    for name, jti in (('revoked', hit), ('valid', miss)):
+        seconds = min(timeit.repeat(lambda: blocklist.is_revoked(jti), number=number, repeat=5))
+        print(f"{name:8} {size} entries: {seconds / number * 1e9:.0f} ns/check")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Throughput and latency of the auth API under a concurrent request mix.
+
+Usage: python -m benchmarks.load_test --concurrency 16 --duration 30 \
+           --mix register=1,login=2,checkAuth=10,updateProfile=1
+
+Starts the Flask app from core/ on a local port, against the mongod at
+MONGO_URL when one answers, otherwise against mongomock (pip install mongomock).
+Prints requests/sec and p50/p95/p99 per endpoint and saves them as JSON.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from datetime import datetime
+from os import environ, makedirs, path
+import http.client
+import argparse
+import random
+import json
+import sys
+import threading
+import time
+import uuid
+
+# Anything read at import time by core/ has to be set before it is imported
+environ.setdefault('MONGO_DB', 'ggame_bench')
+environ.setdefault('LOGIN_RATE_PER_MINUTE', '100000000')  # every client shares 127.0.0.1
+environ.setdefault('LOGIN_RATE_BURST', '100000000')
+
+
+def pick_mongo():
+    """'mongod' when the one at MONGO_URL answers, otherwise 'mongomock' (set up in core.db)."""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    try:
+        MongoClient(environ.get('MONGO_URL', 'mongodb://localhost:27017'), serverSelectionTimeoutMS=500).admin.command('ping')
+        return 'mongod'
+    except PyMongoError:
+        import mongomock
+        from core import db
+        db.mongo_client_class = mongomock.MongoClient
+        db.supports_collation = False
+        return 'mongomock'
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+class SetupFailed(Exception):
+    pass
+
+
+class Client:
+    """One virtual user with its own account and keep-alive connection."""
+
+    def __init__(self, port, results, lock):
+        self.conn = http.client.HTTPConnection('127.0.0.1', port)
+        self.results = results
+        self.lock = lock
+        self.username = f'bench_{uuid.uuid4().hex[:12]}'
+        self.password = 'bench-password'
+        self.token = None
+
+    def request(self, name, method, url, form=None, auth=False):
+        headers = {}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if auth:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        start = time.perf_counter()
+        self.conn.request(method, url, body=body, headers=headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            entry = self.results.setdefault(name, {'latencies': [], 'errors': 0})
+            entry['latencies'].append(elapsed)
+            if response.status >= 400:
+                entry['errors'] += 1
+        return response.status, data
+
+    def register(self):
+        self.username = f'bench_{uuid.uuid4().hex[:12]}'
+        status, _ = self.request('register', 'POST', '/register',
+                                 {'username': self.username, 'email': f'{self.username}@example.com', 'password': self.password})
+        return status
+
+    def login(self):
+        status, data = self.request('login', 'POST', '/login', {'username': self.username, 'password': self.password})
+        if status == 200:
+            self.token = json.loads(data)['access_token']
+        return status
+
+    def check_auth(self):
+        self.request('checkAuth', 'GET', '/checkAuth', auth=True)
+
+    def update_profile(self):
+        new_username = f'bench_{uuid.uuid4().hex[:12]}'
+        status, _ = self.request('updateProfile', 'PATCH', '/updateProfile', {'new_username': new_username}, auth=True)
+        if status == 200:
+            self.username = new_username
+
+
+ACTIONS = {
+    'register': Client.register,
+    'login': Client.login,
+    'checkAuth': Client.check_auth,
+    'updateProfile': Client.update_profile,
+}
+
+
+def run_client(port, mix, deadline, results, lock, abort):
+    client = Client(port, {}, lock)
+    # setup requests are not part of the measurement, but without an account nothing else can pass
+    status = client.register()
+    if status == 201:
+        status = client.login()
+    if status not in (200, 201):
+        abort.set()
+        raise SetupFailed(f'setup request for {client.username} answered {status}')
+
+    client.results = results
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline and not abort.is_set():
+        ACTIONS[random.choices(names, weights)[0]](client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds')
+    parser.add_argument('--mix', default='register=1,login=2,checkAuth=10,updateProfile=1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--output', default=None, help='JSON file, defaults to benchmarks/results/<timestamp>.json')
+    args = parser.parse_args()
+
+    mix = {name: float(weight) for name, weight in (item.split('=') for item in args.mix.split(','))}
+    unknown = set(mix) - set(ACTIONS)
+    if unknown:
+        parser.error(f"unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+
+    backend = pick_mongo()
+    from core.migrate import migrate_user_indexes
+    if not migrate_user_indexes(log=lambda message: None):
+        sys.exit(f"Aborted, the users in {environ['MONGO_DB']} collide ignoring case; run python -m core.migrate")
+
+    from werkzeug.serving import make_server
+    from core import app
+
+    server = make_server('127.0.0.1', args.port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    lock = threading.Lock()
+    abort = threading.Event()
+    started = time.monotonic()
+    deadline = started + args.duration
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(run_client, args.port, mix, deadline, results, lock, abort) for _ in range(args.concurrency)]
+            for future in futures:
+                future.result()
+    except SetupFailed as e:
+        sys.exit(f'Aborted, {e}; no results saved')
+    finally:
+        server.shutdown()
+    elapsed = time.monotonic() - started
+
+    report = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'mongo': backend,
+        'concurrency': args.concurrency,
+        'duration': elapsed,
+        'mix': mix,
+        'endpoints': {},
+    }
+    print(f"{'endpoint':15} {'requests':>9} {'req/s':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, entry in sorted(results.items()):
+        latencies = entry['latencies']
+        stats = {
+            'requests': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'errors': entry['errors'],
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        }
+        report['endpoints'][name] = stats
+        print(f"{name:15} {stats['requests']:9} {stats['rps']:9.1f} {stats['errors']:7} "
+              f"{stats['p50'] * 1000:8.1f} {stats['p95'] * 1000:8.1f} {stats['p99'] * 1000:8.1f}")
+
+    output = args.output or path.join('benchmarks', 'results', f"{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    makedirs(path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Serialization cost and bytes on the wire for a /users page, before and after.
+
+Usage: python -m benchmarks.serialization [users]
+"""
+from bson import ObjectId
+from datetime import datetime
+import gzip
+import json
+import sys
+import timeit
+
+from core.serialization import dumps, default, orjson
+
+
+def flask_default_dumps(obj):
+    # What Flask 2.0's jsonify did: stdlib json, sorted keys, indent off
+    return json.dumps(obj, default=default, sort_keys=True).encode()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    page = {
+        "users": [
+            {"id": ObjectId(), "username": f"user{i}", "email": f"user{i}@example.com", "created_at": datetime.utcnow()}
+            for i in range(count)
+        ],
+        "next_cursor": None,
+    }
+
+    print(f"orjson installed: {orjson is not None}")
+    for name, fn in (('json (before)', flask_default_dumps), ('core.serialization', dumps)):
+        number = 1000
+        seconds = min(timeit.repeat(lambda: fn(page), number=number, repeat=5))
+        print(f"{name:20} {seconds / number * 1e6:8.1f} us/page")
+
+    body = dumps(page)
+    print(f"{'identity':20} {len(body):8} bytes")
+    print(f"{'gzip -6':20} {len(gzip.compress(body, compresslevel=6)):8} bytes")
+    try:
+        import brotli
+        print(f"{'brotli q5':20} {len(brotli.compress(body, quality=5)):8} bytes")
+    except ImportError:
+        print("brotli not installed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Compares full User hydration with the projected/raw lookup path.
+
+Usage: MONGO_URL=... python -m benchmarks.user_lookup [users]
+Writes into MONGO_DB (default ggame_bench) and drops the user collection afterwards.
+"""
+from os import environ
+import sys
+import time
+
+environ.setdefault('MONGO_DB', 'ggame_bench')
+
+from core.db import init_db  # noqa: E402 (reads the env above)
+from core.models.user import User  # noqa: E402
+
+
+def rate(label, count, fn):
+    start = time.perf_counter()
+    loaded = fn()
+    elapsed = time.perf_counter() - start
+    assert loaded == count
+    print(f"{label:28} {count / elapsed:12.0f} docs/sec")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    init_db()
+    collection = User._get_collection()
+    collection.drop()
+
+    # Insert directly, the benchmark is about reads and shouldn't pay for hashing
+    pwhash = 'pbkdf2:sha256:260000$' + 'x' * 16 + '$' + 'y' * 64
+    collection.insert_many([
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': pwhash, 'profile_version': 0}
+        for i in range(count)
+    ])
+
+    try:
+        rate('full Document', count, lambda: sum(1 for _ in User.objects))
+        rate('only(username, email)', count, lambda: sum(1 for _ in User.objects.only('username', 'email')))
+        rate('only + as_pymongo', count, lambda: sum(1 for _ in User.objects.only('username', 'email').as_pymongo()))
+    finally:
+        collection.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import logging
+import logging.handlers
+import queue
+import random
+import json
+import sys
+import os
+from datetime import datetime, timezone
+
+# Atributos estándar de LogRecord, todo lo demás viene de extra={...}
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por evento"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RESERVED})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:  # DeferredQueueHandler ya lo dejó como texto
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar solo una fracción de los eventos INFO/DEBUG de alto volumen"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.INFO or random.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que encola el registro sin formatear
+
+    QueueHandler.prepare() llama a format() en el hilo que registra (el event
+    loop) y borra exc_info, así el formateo no salía del loop y el traceback se
+    perdía. Aquí solo el traceback se pasa a texto, para no retener sus frames;
+    el JSON lo arma el handler del QueueListener.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging():
+    """Configurar el logger 'bot' con una cola y un hilo escritor
+
+    Los handlers del event loop solo encolan el registro (QueueHandler); el
+    formateo a JSON y la escritura a stdout ocurren en el hilo del QueueListener.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    root = logging.getLogger('bot')
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.propagate = False
+
+    # Mensajes recibidos: muestreados, por defecto 1 de cada 100
+    get_logger('messages').addFilter(SamplingFilter(float(os.getenv('LOG_MESSAGE_SAMPLE_RATE', 0.01))))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Vaciar la cola y detener el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(system):
+    """Logger por sistema, p. ej. get_logger('radio') -> 'bot.radio'"""
+    return logging.getLogger(f'bot.{system}')
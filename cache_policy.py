@@ -0,0 +1,152 @@
+import discord
+from datetime import datetime
+import os
+from extension_manager import rss_mb
+from bot_logging import get_logger
+from permissions import require, STAFF
+
+logger = get_logger('cache_policy')
+
+# Lo que necesitan los comandos de app.py (prefijo pc!, ayuda, ping)
+BASE_INTENTS = {'guilds', 'guild_messages', 'message_content'}
+
+# Lo que cada extensión pide del gateway y de la caché:
+#   intents: flags de discord.Intents
+#   member_cache: flags de discord.MemberCacheFlags
+#   messages: usa la caché de mensajes (on_message_edit, reacciones sobre mensajes cacheados...)
+# Una extensión que no aparece aquí recibe todo, como con Intents.all().
+REQUIREMENTS = {
+    'whitelist_system': {},  # get_or_fetch_member para los postulantes fuera de caché
+    'warn_system': {},
+    'rating_system': {},
+    'suggestion_system': {},
+    'warning_system': {},
+    'staff_accept_system': {},
+    'register_instagram': {},
+    'anonymous_system': {},
+    'whitelist_schedule_system': {},
+    'radio_system': {  # role.members (con ensure_chunked) y miembros conectados a la radio
+        'intents': {'members', 'voice_states'},
+        'member_cache': {'joined', 'voice'}
+    },
+}
+
+DEFAULT_MAX_MESSAGES = 1000  # el valor por defecto de discord.py
+
+
+def cache_options(extensions):
+    """Argumentos de commands.Bot para las extensiones configuradas
+
+    BOT_CACHE_POLICY=full vuelve a Intents.all() con la caché por defecto;
+    BOT_MAX_MESSAGES fija el tamaño de la caché de mensajes (0 la desactiva).
+    """
+    undeclared = [name for name in extensions if name not in REQUIREMENTS]
+    if os.getenv('BOT_CACHE_POLICY', 'auto') == 'full' or undeclared:
+        intents = discord.Intents.all()
+        options = {
+            'intents': intents,
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+            'max_messages': DEFAULT_MAX_MESSAGES,
+            'chunk_guilds_at_startup': True
+        }
+        if undeclared:
+            logger.info("Extensiones sin requisitos de caché declarados, se usa la política completa",
+                        extra={"extensions": undeclared})
+    else:
+        intents = discord.Intents.none()
+        member_cache = discord.MemberCacheFlags.none()
+        messages = False
+        for name in extensions:
+            requirements = REQUIREMENTS[name]
+            for flag in requirements.get('intents', set()):
+                setattr(intents, flag, True)
+            for flag in requirements.get('member_cache', set()):
+                setattr(member_cache, flag, True)
+            messages = messages or requirements.get('messages', False)
+        for flag in BASE_INTENTS:
+            setattr(intents, flag, True)
+        options = {
+            'intents': intents,
+            'member_cache_flags': member_cache,
+            'max_messages': DEFAULT_MAX_MESSAGES if messages else None,
+            'chunk_guilds_at_startup': False  # los sistemas piden la lista con ensure_chunked()
+        }
+
+    if os.getenv('BOT_MAX_MESSAGES'):
+        options['max_messages'] = int(os.getenv('BOT_MAX_MESSAGES')) or None
+    return options
+
+
+async def ensure_chunked(guild):
+    """Pedir la lista completa de miembros la primera vez que un sistema la necesita"""
+    if not guild.chunked:
+        await guild.chunk()
+
+
+async def get_or_fetch_member(guild, user_id):
+    """Miembro desde la caché o, si no está cacheado, desde la API"""
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
+
+
+class CacheReport:
+    """Tamaño de las cachés del bot y memoria del proceso (pc!mem)"""
+
+    def __init__(self, bot, options):
+        self.bot = bot
+        self.options = options  # lo que devolvió cache_options()
+        self.setup_commands()
+
+    def sizes(self):
+        guilds = self.bot.guilds
+        return {
+            "guilds": len(guilds),
+            "members": sum(len(guild.members) for guild in guilds),
+            "users": len(self.bot.users),
+            "channels": sum(len(guild.channels) for guild in guilds),
+            "roles": sum(len(guild.roles) for guild in guilds),
+            "messages": len(self.bot.cached_messages),
+            "voice_states": sum(len(channel.members) for guild in guilds for channel in guild.voice_channels)
+        }
+
+    def setup_commands(self):
+        """Configurar comando pc!mem"""
+
+        @self.bot.command(name='mem')
+        @require(STAFF)
+        async def mem_command(ctx):
+            """Tamaño de las cachés y memoria residente"""
+            embed = discord.Embed(
+                title="🧠 Memoria del bot",
+                color=discord.Color.blue(),
+                timestamp=datetime.now())
+
+            rss = rss_mb()
+            embed.add_field(name="RSS", value=f"{rss:.1f} MB" if rss is not None else "No disponible", inline=True)
+            embed.add_field(
+                name="Caché de mensajes",
+                value=f"{len(self.bot.cached_messages)} / {self.options['max_messages'] or 0}",
+                inline=True)
+
+            sizes = self.sizes()
+            embed.add_field(
+                name="Cachés",
+                value="\n".join(f"**{name}:** {count}" for name, count in sizes.items()),
+                inline=False)
+
+            chunked = sum(1 for guild in self.bot.guilds if guild.chunked)
+            intents = [name for name, enabled in self.options['intents'] if enabled]
+            embed.add_field(
+                name="Política",
+                value=f"**Chunking al iniciar:** {'sí' if self.options['chunk_guilds_at_startup'] else 'no'}\n"
+                f"**Servidores con todos los miembros:** {chunked}/{len(self.bot.guilds)}\n"
+                f"**Intents:** {', '.join(intents)}",
+                inline=False)
+
+            embed.set_footer(text="Puro Chile RP - Métricas del bot")
+            await ctx.send(embed=embed)
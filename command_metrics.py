@@ -0,0 +1,165 @@
+import discord
+from collections import defaultdict, deque
+from datetime import datetime
+from permissions import require, STAFF
+import time
+
+# Límites de los buckets del histograma (segundos)
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class CommandMetrics:
+    """Latencia, errores y concurrencia de los comandos (prefijo y slash)"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.histograms = defaultdict(lambda: [0] * len(BUCKETS))  # (tipo, comando): conteo por bucket
+        self.sums = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.in_flight = defaultdict(int)
+        self.recent = deque(maxlen=50000)  # (timestamp, comando, duración) para pc!perf
+        self.setup_hooks()
+        self.setup_commands()
+
+    def setup_hooks(self):
+        """Registrar hooks globales de comandos"""
+
+        @self.bot.before_invoke
+        async def start_timer(ctx):
+            ctx.metrics_started = time.perf_counter()
+            self.in_flight[('prefix', ctx.command.qualified_name)] += 1
+
+        @self.bot.after_invoke
+        async def stop_timer(ctx):
+            # discord.py llama a after_invoke también cuando el comando falla
+            if not hasattr(ctx, 'metrics_started'):
+                return
+            key = ('prefix', ctx.command.qualified_name)
+            self.in_flight[key] -= 1
+            self.observe(key, time.perf_counter() - ctx.metrics_started)
+
+        async def count_error(ctx, error):
+            if ctx.command is not None:
+                self.errors[('prefix', ctx.command.qualified_name)] += 1
+
+        # add_listener no reemplaza el on_command_error de app.py
+        self.bot.add_listener(count_error, 'on_command_error')
+
+        original_interaction_check = self.bot.tree.interaction_check
+
+        async def app_command_start(interaction):
+            # Los slash no tienen before_invoke global; interaction_check es lo primero que
+            # corre CommandTree._call, así se mide con el mismo reloj que los de prefijo
+            allowed = await original_interaction_check(interaction)
+            if allowed and interaction.type is discord.InteractionType.application_command:
+                command = interaction.command
+                key = ('slash', command.qualified_name if command is not None else interaction.data.get('name'))
+                interaction.extras['metrics'] = (key, time.perf_counter())
+                self.in_flight[key] += 1
+            return allowed
+
+        self.bot.tree.interaction_check = app_command_start
+
+        async def app_command_done(interaction, command):
+            self.finish_app_command(interaction)
+
+        self.bot.add_listener(app_command_done, 'on_app_command_completion')
+
+        original_on_error = self.bot.tree.on_error
+
+        async def app_command_error(interaction, error):
+            key = self.finish_app_command(interaction)
+            if key is not None:
+                self.errors[key] += 1
+            await original_on_error(interaction, error)
+
+        self.bot.tree.on_error = app_command_error
+
+    def finish_app_command(self, interaction):
+        """Cerrar la medición de un slash (completado o con error), devuelve su clave"""
+        key, started = interaction.extras.pop('metrics', (None, None))
+        if key is not None:
+            self.in_flight[key] -= 1
+            self.observe(key, time.perf_counter() - started)
+        return key
+
+    def setup_commands(self):
+        """Configurar comando pc!perf"""
+
+        @self.bot.command(name='perf')
+        @require(STAFF)
+        async def perf_command(ctx):
+            """Comandos más lentos de la última hora"""
+            since = time.time() - 3600
+            durations = defaultdict(list)
+            for timestamp, name, duration in self.recent:
+                if timestamp >= since:
+                    durations[name].append(duration)
+
+            embed = discord.Embed(
+                title="⏱️ Rendimiento de comandos (última hora)",
+                color=discord.Color.blue(),
+                timestamp=datetime.now())
+
+            if not durations:
+                embed.description = "No se han ejecutado comandos en la última hora."
+                await ctx.send(embed=embed)
+                return
+
+            slowest = sorted(durations.items(), key=lambda item: percentile(item[1], 95), reverse=True)[:10]
+            for name, values in slowest:
+                errors = sum(count for (_, command), count in self.errors.items() if command == name)
+                embed.add_field(
+                    name=f"`{name}`",
+                    value=f"**Usos:** {len(values)}\n"
+                    f"**p50:** {percentile(values, 50) * 1000:.0f}ms\n"
+                    f"**p95:** {percentile(values, 95) * 1000:.0f}ms\n"
+                    f"**Máx:** {max(values) * 1000:.0f}ms\n"
+                    f"**Errores (total):** {errors}",
+                    inline=True)
+
+            embed.set_footer(text="Puro Chile RP - Métricas del bot")
+            await ctx.send(embed=embed)
+
+    def observe(self, key, duration):
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.histograms[key][i] += 1
+                break
+        self.sums[key] += duration
+        self.counts[key] += 1
+        self.recent.append((time.time(), key[1], duration))
+
+    def export(self):
+        """Métricas en formato de texto de Prometheus"""
+        lines = [
+            '# HELP bot_command_duration_seconds Command latency',
+            '# TYPE bot_command_duration_seconds histogram'
+        ]
+        for (kind, name), buckets in self.histograms.items():
+            labels = f'type="{kind}",command="{name}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'bot_command_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'bot_command_duration_seconds_bucket{{{labels},le="+Inf"}} {self.counts[(kind, name)]}')
+            lines.append(f'bot_command_duration_seconds_sum{{{labels}}} {self.sums[(kind, name)]}')
+            lines.append(f'bot_command_duration_seconds_count{{{labels}}} {self.counts[(kind, name)]}')
+
+        lines.append('# HELP bot_command_errors_total Commands that raised an error')
+        lines.append('# TYPE bot_command_errors_total counter')
+        for (kind, name), count in self.errors.items():
+            lines.append(f'bot_command_errors_total{{type="{kind}",command="{name}"}} {count}')
+
+        lines.append('# HELP bot_commands_in_flight Commands currently running')
+        lines.append('# TYPE bot_commands_in_flight gauge')
+        for (kind, name), count in self.in_flight.items():
+            lines.append(f'bot_commands_in_flight{{type="{kind}",command="{name}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
@@ -0,0 +1,82 @@
+import discord
+from datetime import datetime
+import hashlib
+import json
+import os
+from bot_logging import get_logger
+from permissions import require, STAFF
+
+logger = get_logger('command_sync')
+
+FINGERPRINT_FILE = 'data/command_tree.json'
+
+
+class CommandSync:
+    """Sincroniza los comandos slash con Discord solo cuando el árbol cambió"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.setup_commands()
+
+    def fingerprint(self):
+        """Hash estable del árbol de comandos slash tal como se enviaría a Discord"""
+        payload = []
+        for command in self.bot.tree.get_commands():
+            try:
+                payload.append(command.to_dict(self.bot.tree))  # discord.py >= 2.4
+            except TypeError:
+                payload.append(command.to_dict())
+        payload.sort(key=lambda data: (data.get('type', 1), data['name']))
+        data = json.dumps({"application_id": self.bot.application_id, "commands": payload},
+                          sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def load_fingerprint(self):
+        try:
+            with open(FINGERPRINT_FILE, 'r') as f:
+                return json.load(f).get('fingerprint')
+        except (OSError, ValueError):
+            return None
+
+    def save_fingerprint(self, fingerprint):
+        os.makedirs(os.path.dirname(FINGERPRINT_FILE), exist_ok=True)
+        with open(FINGERPRINT_FILE, 'w') as f:
+            json.dump({"fingerprint": fingerprint, "synced_at": datetime.now().isoformat()}, f, indent=2)
+
+    async def sync(self, force=False):
+        """Llamar a tree.sync() si el fingerprint cambió (o si force), devuelve los comandos o None"""
+        fingerprint = self.fingerprint()
+        if not force and fingerprint == self.load_fingerprint():
+            logger.info("Árbol de comandos sin cambios, no se sincroniza",
+                        extra={"fingerprint": fingerprint[:12]})
+            return None
+
+        synced = await self.bot.tree.sync()
+        self.save_fingerprint(fingerprint)
+        logger.info(f'Sincronizados {len(synced)} comandos slash',
+                    extra={"fingerprint": fingerprint[:12], "forced": force})
+        return synced
+
+    def setup_commands(self):
+        """Configurar comando pc!sync"""
+
+        @self.bot.command(name='sync')
+        @require(STAFF)
+        async def sync_command(ctx):
+            """Forzar la sincronización de los comandos slash"""
+            try:
+                synced = await self.sync(force=True)
+            except discord.HTTPException as e:
+                logger.error(f'Error sincronizando comandos: {e}')
+                embed = discord.Embed(
+                    title="❌ Error sincronizando comandos",
+                    description=str(e),
+                    color=discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+
+            embed = discord.Embed(
+                title="🔄 Comandos sincronizados",
+                description=f"Se sincronizaron {len(synced)} comandos slash con Discord.",
+                color=discord.Color.green())
+            await ctx.send(embed=embed)
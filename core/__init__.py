@@ -1,6 +1,7 @@
 from flask import Flask
 from dotenv import load_dotenv
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from os import environ
 from datetime import timedelta
 
@@ -10,9 +11,47 @@ load_dotenv()
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = environ.get('JWT_SECRET_KEY', 'super-secret')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=15) # but days=30
+app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+app.config['JWT_PROFILE_CLAIMS'] = environ.get('JWT_PROFILE_CLAIMS', 'false').lower() == 'true' # /checkAuth answers from the token
+app.config['ADMIN_API_KEY'] = environ.get('ADMIN_API_KEY') # admin endpoints are disabled when unset
+app.config['BULK_BATCH_SIZE'] = int(environ.get('BULK_BATCH_SIZE', 500))
+app.config['LOOKUP_MAX_KEYS'] = int(environ.get('LOOKUP_MAX_KEYS', 100))
+app.config['COMPRESS_MIN_SIZE'] = int(environ.get('COMPRESS_MIN_SIZE', 1024)) # bytes, -1 disables compression
+app.config['COMPRESS_GZIP_LEVEL'] = 6
+app.config['COMPRESS_BROTLI_QUALITY'] = 5
+app.config['METRICS_MODE'] = environ.get('METRICS_MODE', 'basic') # off, basic, or full (adds MongoDB command timing)
+app.config['TRUSTED_PROXY_HOPS'] = int(environ.get('TRUSTED_PROXY_HOPS', 0)) # reverse proxies in front of the app
+
+# Behind reverse proxies request.remote_addr is the last proxy, take the client from X-Forwarded-For instead
+if app.config['TRUSTED_PROXY_HOPS']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'], x_proto=0)
 
 # Setup the Flask-JWT-Extended extension
 jwt = JWTManager(app)
 
+from core.metrics import Metrics
+from core.hashing import hasher
+
+# Request metrics, exported at /metrics
+metrics = Metrics(mode=app.config['METRICS_MODE'])
+metrics.collectors.append(hasher.metric_lines)
+metrics.init_app(app)
+
+from core import compression
+compression.init_app(app)
+
+from core.db import init_db
+from core.blocklist import blocklist
+
+@app.before_request
+def connect_db():
+    init_db() # no-op once this process is connected
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    # in-memory lookup, refreshed incrementally every few seconds. Refresh tokens are
+    # confirmed against the database so a rotated one can't be replayed on another worker
+    return blocklist.is_revoked(jwt_payload['jti'], strict=jwt_payload['type'] == 'refresh')
+
 from core.routes.auth_routes import bp # import blueprint
 app.register_blueprint(bp) # register blueprint
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""Async variant of the auth routes, served with: uvicorn core.asgi:app
+
+It answers /register, /login, /checkAuth, /logout and /updateProfile with the
+same responses as the Flask blueprint. User queries go through motor and
+password hashing awaits the shared process pool, so a single process can keep
+many more requests in flight. Tokens are still created and decoded by
+flask_jwt_extended inside the Flask app context, so both variants issue and
+accept exactly the same JWTs.
+"""
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.background import BackgroundTask
+from starlette.routing import Route
+from werkzeug.http import parse_list_header
+from motor.motor_asyncio import AsyncIOMotorClient
+from flask_jwt_extended import create_refresh_token, decode_token
+from flask_jwt_extended.exceptions import JWTDecodeError
+from jwt import ExpiredSignatureError, InvalidTokenError
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from datetime import datetime
+from core import app as flask_app
+from core.db import init_db, mongo_url, database_name, pool_options
+from core.models.user import User, CASE_INSENSITIVE, needs_hashing
+from core.serialization import dumps
+from core.hashing import hasher, HashingBusy
+from core.blocklist import blocklist
+from core.ratelimit import login_limiter, login_keys, TokenBucketLimiter
+from core.availability import taken_names
+from core.routes.auth_routes import create_user_token, profile_versions
+import asyncio
+
+users = None  # motor collection, created at startup inside the running loop
+
+
+def run_sync(fn, *args):
+    # asyncio.to_thread needs Python 3.9, the Docker image runs 3.8
+    return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+def jsonify(data, status=200, headers=None, background=None):
+    # Same bytes as core.serialization.jsonify
+    return Response(dumps(data) + b'\n', status_code=status, headers=headers,
+                    media_type=flask_app.config['JSONIFY_MIMETYPE'], background=background)
+
+
+async def startup():
+    global users
+    client = AsyncIOMotorClient(mongo_url, **pool_options())
+    users = client[database_name][User._get_collection_name()]
+    # The blocklist and the Bloom filter still use mongoengine, from worker threads
+    await run_sync(init_db)
+    await run_sync(taken_names.load)
+
+
+async def current_token(request, refresh=False):
+    """Decode the bearer token like @jwt_required(), returns (token, error_response).
+
+    refresh=True only accepts refresh tokens, False only access tokens and None either.
+    """
+    header = request.headers.get('Authorization')
+    if header is None:
+        return None, jsonify({"msg": "Missing Authorization Header"}, 401)
+
+    parts = header.split()
+    if len(parts) != 2 or parts[0] != 'Bearer':
+        return None, jsonify({"msg": "Missing 'Bearer' type in 'Authorization' header. Expected 'Authorization: Bearer <JWT>'"}, 401)
+
+    try:
+        with flask_app.app_context():
+            token = decode_token(parts[1])
+    except ExpiredSignatureError:
+        return None, jsonify({"msg": "Token has expired"}, 401)
+    except (InvalidTokenError, JWTDecodeError) as e:  # e.g. a token without a sub claim
+        return None, jsonify({"msg": str(e)}, 422)
+
+    if refresh is not None:
+        if refresh and token['type'] != 'refresh':
+            return None, jsonify({"msg": "Only refresh tokens are allowed"}, 422)
+        if not refresh and token['type'] == 'refresh':
+            return None, jsonify({"msg": "Only non-refresh tokens are allowed"}, 422)
+
+    if blocklist.needs_refresh():
+        await run_sync(blocklist.refresh)
+    if token['jti'] in blocklist:
+        return None, jsonify({"msg": "Token has been revoked"}, 401)
+
+    return token, None
+
+
+def client_ip(request):
+    """Client address, the same one ProxyFix(x_for=TRUSTED_PROXY_HOPS) gives the Flask app."""
+    hops = flask_app.config['TRUSTED_PROXY_HOPS']
+    forwarded = parse_list_header(','.join(request.headers.getlist('X-Forwarded-For'))) if hops else []
+    if len(forwarded) >= hops > 0:
+        return forwarded[-hops]  # appended by the outermost trusted proxy, anything before it can be forged
+    return request.client.host if request.client else None
+
+
+async def allow_login(*keys):
+    if isinstance(login_limiter, TokenBucketLimiter):  # in memory, no I/O
+        return all(login_limiter.allow(key) for key in keys)
+    return await run_sync(lambda: all(login_limiter.allow(key) for key in keys))
+
+
+def busy():
+    return jsonify({"msg": "Server is busy, try again later"}, 503, {'Retry-After': '1'})
+
+
+async def register(request):
+    form = await request.form()
+    username = form.get('username', None)
+    email = form.get('email', None)
+    password = form.get('password', None)
+
+    # Build the document through the model so it has exactly the fields save() would write,
+    # and is validated the same way
+    user = User(username=username, password=password, email=email, updated_at=datetime.utcnow())
+    error = user.registration_error()
+    if error:
+        return jsonify({"msg": error}, 400)
+    try:
+        if needs_hashing(user.password):
+            user.password = await hasher.generate_async(user.password)
+    except HashingBusy:
+        return busy()
+
+    try:
+        await users.insert_one(user.to_mongo())
+    except DuplicateKeyError as e:
+        if User.duplicate_field(e) == 'email':
+            return jsonify({"msg": "Email already exists"}, 400)
+        return jsonify({"msg": "Username already exists"}, 400)
+
+    taken_names.add(username, email)
+    return jsonify({'result': 'ok'}, 201)
+
+
+async def login(request):
+    form = await request.form()
+    username = form.get('username', None)
+    password = form.get('password', None)
+
+    if not await allow_login(*login_keys(client_ip(request), username)):
+        return jsonify({"msg": "Too many login attempts, try again later"}, 429,
+                       {'Retry-After': str(login_limiter.retry_after)})
+
+    doc = await users.find_one({'username': username}, collation=CASE_INSENSITIVE) if username is not None else None
+
+    try:
+        valid = doc is not None and await hasher.check_async(doc['password'], password)
+    except HashingBusy:
+        return busy()
+
+    if not valid:
+        return jsonify({"msg": "Bad username or password"}, 401)
+
+    user = User._from_son(doc)
+    with flask_app.app_context():
+        access_token = create_user_token(user)
+        refresh_token = create_refresh_token(identity=str(user.id))
+
+    background = None
+    if hasher.needs_rehash(user.password):  # runs in a thread once the response is sent
+        background = BackgroundTask(User.upgrade_password, user.id, user.password, password)
+    return jsonify({"access_token": access_token, "refresh_token": refresh_token}, background=background)
+
+
+async def check_auth(request):
+    token, error = await current_token(request)
+    if error:
+        return error
+    identity = token['sub']
+
+    profile = token.get('profile')
+    if profile is not None:
+        version = profile_versions.get(identity)
+        if version is not None and profile['v'] >= version:
+            return jsonify({"username": profile['username'], "email": profile['email']})
+
+    user = await users.find_one({'_id': ObjectId(identity)}, {'username': 1, 'email': 1, 'profile_version': 1})
+    if not user:
+        return jsonify({"msg": "User not found"}, 404)
+    profile_versions.set(identity, user.get('profile_version', 0))
+    return jsonify({"username": user['username'], "email": user['email']})
+
+
+async def logout(request):
+    token, error = await current_token(request, refresh=None)  # access or refresh token
+    if error:
+        return error
+    await run_sync(blocklist.revoke, token['jti'], token['exp'])
+    return jsonify({"msg": "Successfully logged out"})
+
+
+async def update_profile(request):
+    token, error = await current_token(request)
+    if error:
+        return error
+    form = await request.form()
+    new_username = form.get('new_username', None)
+
+    changes = {'$set': {'updated_at': datetime.utcnow()}}
+    if new_username is not None:
+        changes['$set']['username'] = new_username
+        changes['$inc'] = {'profile_version': 1}
+
+    try:
+        doc = await users.find_one_and_update({'_id': ObjectId(token['sub'])}, changes,
+                                              projection={'password': 0}, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        return jsonify({"msg": "Desired username has already been taken"}, 400)
+
+    if doc is None:
+        return jsonify({"msg": "User not found"}, 404)
+
+    taken_names.add(new_username)
+
+    if flask_app.config['JWT_PROFILE_CLAIMS']:
+        with flask_app.app_context():
+            access_token = create_user_token(User._from_son(doc))
+        return jsonify({"msg": "Profile updated successfully!", "access_token": access_token})
+
+    return jsonify({"msg": "Profile updated successfully!"})
+
+
+app = Starlette(
+    routes=[
+        Route('/register', register, methods=['POST']),
+        Route('/login', login, methods=['POST']),
+        Route('/checkAuth', check_auth, methods=['GET']),
+        Route('/logout', logout, methods=['POST']),
+        Route('/updateProfile', update_profile, methods=['PATCH']),
+    ],
+    on_startup=[startup],
+)
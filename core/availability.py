@@ -0,0 +1,87 @@
+from core.bloom import BloomFilter
+from core.models.user import User
+from mongoengine import signals
+from threading import Lock
+from datetime import datetime
+from os import environ
+import time
+
+
+class TakenNames:
+    """Bloom filter of every username and email, lowercased, kept by each worker.
+
+    A miss means the name is definitely free. A hit may be a false positive,
+    so callers confirm it with an indexed query. Saves in this worker are added
+    right away; changes made by other workers are pulled every
+    `refresh_interval` seconds using updated_at, so until then a name taken
+    elsewhere can be reported free. /register still relies on the unique index.
+    """
+
+    def __init__(self, capacity, refresh_interval=30.0):
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self._filter = None
+        self._since = None
+        self._last_refresh = 0.0
+        self._lock = Lock()
+
+    def load(self):
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        # Filled aside and swapped in once complete, readers keep the old filter meanwhile
+        self._last_refresh = time.monotonic()
+        started = datetime.utcnow()
+        bloom = BloomFilter(self.capacity)
+        for user in User.objects.only('username', 'email').as_pymongo():
+            for name in (user.get('username'), user.get('email')):
+                if name:
+                    bloom.add(name.lower())
+        self._filter = bloom
+        self._since = started
+
+    def refresh(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already refreshing
+
+        try:
+            self._last_refresh = time.monotonic()
+            started = datetime.utcnow()
+            query = User.objects(updated_at__gte=self._since).only('username', 'email').as_pymongo()
+            for user in query:
+                self.add(user.get('username'), user.get('email'))
+            self._since = started
+        finally:
+            self._lock.release()
+
+    def add(self, *names):
+        if self._filter is None:
+            return  # not loaded yet, load() will pick these up from the database
+        for name in names:
+            if name:
+                self._filter.add(name.lower())
+
+    def might_be_taken(self, name):
+        if self._filter is None:
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._filter is None:
+                        self._rebuild()
+                finally:
+                    self._lock.release()
+            if self._filter is None:
+                return True  # another thread is still loading, let the caller query
+        elif time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+        return name.lower() in self._filter
+
+
+taken_names = TakenNames(capacity=int(environ.get('BLOOM_CAPACITY', 1000000)),
+                         refresh_interval=float(environ.get('BLOOM_REFRESH_INTERVAL', 30)))
+
+
+def remember_names(sender, document, **kwargs):
+    taken_names.add(document.username, document.email)
+
+signals.post_save.connect(remember_names, sender=User)  # post_save signal to keep the filter current
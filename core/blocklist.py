@@ -0,0 +1,84 @@
+from threading import Lock
+from datetime import datetime, timedelta
+from os import environ
+from core.models.revoked_token import RevokedToken
+from pymongo.errors import DuplicateKeyError
+import time
+
+
+class TokenBlocklist:
+    """Per-worker copy of the revoked token collection.
+
+    Lookups are a dict membership test. Every `refresh_interval` seconds the
+    next lookup pulls only the tokens revoked since the last refresh, so other
+    workers' logouts show up without a database round trip per request.
+
+    Revocations are ordered by a timestamp the database server sets, and each
+    pull re-reads the last `overlap` seconds, so a revocation from another host
+    or one that committed late is still picked up.
+    """
+
+    def __init__(self, refresh_interval=5.0, overlap=60.0):
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._revoked = {}  # jti: exp
+        self._last_seen = None  # newest created_at loaded so far
+        self._last_refresh = 0.0
+        self._lock = Lock()
+
+    def revoke(self, jti, exp):
+        """Revoke a token, returns False if it had already been revoked."""
+        exp = datetime.utcfromtimestamp(exp)
+        try:
+            # created_at comes from the server clock, see refresh()
+            result = RevokedToken._get_collection().update_one(
+                {'jti': jti}, {'$setOnInsert': {'exp': exp}, '$currentDate': {'created_at': True}}, upsert=True)
+            revoked = result.upserted_id is not None
+        except DuplicateKeyError:  # a concurrent revoke of the same jti won the upsert
+            revoked = False
+        self._revoked[jti] = exp
+        return revoked
+
+    def needs_refresh(self):
+        return time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def is_revoked(self, jti, strict=False):
+        if self.needs_refresh():
+            self.refresh()
+        if jti in self._revoked:
+            return True
+        if strict:  # don't wait for the next refresh, ask the database
+            return RevokedToken.objects(jti=jti).only('jti').first() is not None
+        return False
+
+    def refresh(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already refreshing
+
+        try:
+            self._last_refresh = time.monotonic()
+            query = RevokedToken.objects.only('jti', 'exp', 'created_at')
+            if self._last_seen is not None:
+                query = query.filter(created_at__gte=self._last_seen - self.overlap)
+
+            for token in query:  # the overlap re-reads some tokens, keyed by jti they just overwrite
+                self._revoked[token.jti] = token.exp
+                if self._last_seen is None or token.created_at > self._last_seen:
+                    self._last_seen = token.created_at
+
+            # Expired tokens are rejected by the JWT check anyway
+            now = datetime.utcnow()
+            for jti in [jti for jti, exp in list(self._revoked.items()) if exp <= now]:
+                del self._revoked[jti]
+        finally:
+            self._lock.release()
+
+    def __contains__(self, jti):
+        return jti in self._revoked
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+blocklist = TokenBlocklist(refresh_interval=float(environ.get('BLOCKLIST_REFRESH_INTERVAL', 5)),
+                           overlap=float(environ.get('BLOCKLIST_REFRESH_OVERLAP', 60)))
@@ -0,0 +1,25 @@
+from hashlib import blake2b
+import math
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a tunable false positive rate."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)  # bits
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: two 64-bit halves of one digest give every position
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
@@ -0,0 +1,36 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class TTLCache:
+    """Small per-worker LRU whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=10000, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key: (expires, value)
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return  # caching disabled
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
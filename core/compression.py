@@ -0,0 +1,35 @@
+from flask import request
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def init_app(app):
+    """Compress large JSON responses with brotli or gzip, whichever the client accepts."""
+
+    @app.after_request
+    def compress_response(response):
+        min_size = app.config['COMPRESS_MIN_SIZE']
+        if (min_size < 0 or response.direct_passthrough or response.status_code < 200
+                or 'Content-Encoding' in response.headers or response.mimetype != 'application/json'):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response  # small payloads don't win anything
+
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            response.set_data(brotli.compress(data, quality=app.config['COMPRESS_BROTLI_QUALITY']))
+            response.headers['Content-Encoding'] = 'br'
+        elif accepted['gzip']:
+            response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_GZIP_LEVEL']))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,54 @@
+from mongoengine import connect, get_db
+from threading import Lock
+from os import environ, getpid
+
+mongo_url = environ.get('MONGO_URL', 'mongodb://localhost:27017')
+database_name = environ.get('MONGO_DB', 'ggame')
+
+# env variable: MongoClient option
+POOL_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+}
+
+# MongoClient replacement, e.g. mongomock.MongoClient when benchmarks run without a mongod.
+# mongomock cursors have no collation(), queries then match username and email exactly.
+mongo_client_class = None
+supports_collation = True
+
+_lock = Lock()
+_pid = None
+
+
+def pool_options():
+    return {option: int(environ[name]) for name, option in POOL_OPTIONS.items() if environ.get(name)}
+
+
+def init_db(warm=False):
+    """Connect the default alias once per process.
+
+    Nothing connects at import time, so a gunicorn master loaded with --preload
+    never shares a MongoClient (and its sockets and monitor threads) with the
+    workers it forks. Each worker connects on its own, either from the
+    post_fork hook in gunicorn.conf.py or on its first request.
+    """
+    global _pid
+    if _pid == getpid():
+        return
+
+    with _lock:
+        if _pid == getpid():
+            return
+        options = pool_options()
+        if mongo_client_class is not None:
+            options['mongo_client_class'] = mongo_client_class
+        connect(db=database_name, host=mongo_url, alias="default", **options)
+        _pid = getpid()
+
+    if warm:
+        get_db().client.admin.command('ping')  # open the first connection before traffic arrives
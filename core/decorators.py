@@ -0,0 +1,18 @@
+from flask import request, current_app
+from core.serialization import jsonify
+from functools import wraps
+import hmac
+
+
+def admin_required(fn):
+    """Allow the request only if it carries the configured X-Admin-Key header."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        admin_key = current_app.config['ADMIN_API_KEY']
+        given_key = request.headers.get('X-Admin-Key', '')
+
+        if not admin_key or not hmac.compare_digest(given_key, admin_key):
+            return jsonify({"msg": "Admin access required"}), 403
+
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,294 @@
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from werkzeug.security import generate_password_hash, check_password_hash
+from os import environ, cpu_count, getpid
+import hashlib
+import asyncio
+import time
+
+DEFAULT_ITERATIONS = 260000  # Werkzeug 2.0's pbkdf2:sha256 default
+MIN_ITERATIONS = 100000
+ITERATION_STEP = 10000  # calibrated counts are rounded down to this, so close measurements agree
+
+
+def _hash_pbkdf2(password, method):
+    return generate_password_hash(password, method)
+
+
+def _hash_many(passwords, method):
+    return [generate_password_hash(password, method) for password in passwords]
+
+
+def calibrate_iterations(budget_ms, floor=MIN_ITERATIONS, rounds=5):
+    """pbkdf2:sha256 iterations that take about `budget_ms` on this machine, never below `floor`.
+
+    Uses the fastest of a few samples and rounds down to ITERATION_STEP, so
+    calibrations on the same machine rarely disagree.
+    """
+    sample = 20000
+    elapsed = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', b'calibration', b'0123456789abcdef', sample)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    iterations = int(sample * budget_ms / 1000 / elapsed) // ITERATION_STEP * ITERATION_STEP
+    return max(iterations, floor)
+
+
+def calibrate_env():
+    """Resolve HASH_LATENCY_BUDGET_MS into HASH_ITERATIONS in this process's environment.
+
+    The result is stored back in the environment, so processes started from this
+    one (the workers gunicorn forks after on_starting in gunicorn.conf.py) use the
+    same count instead of each calibrating on its own.
+    """
+    budget = environ.get('HASH_LATENCY_BUDGET_MS')
+    if budget and not environ.get('HASH_ITERATIONS'):
+        environ['HASH_ITERATIONS'] = str(calibrate_iterations(float(budget)))
+    return environ.get('HASH_ITERATIONS')
+
+
+def hash_iterations(pwhash):
+    """Iteration count stored in a Werkzeug hash, None when it isn't a pbkdf2 hash."""
+    method = pwhash.split('$', 1)[0].split(':')
+    if method[0] != 'pbkdf2':
+        return None
+    return int(method[2]) if len(method) > 2 else 150000  # older Werkzeug left the count out
+
+
+class HashingBusy(Exception):
+    """Raised when every hashing slot is taken, a hash times out or the pool
+    broke, so the caller can answer 503."""
+
+
+class HashingExecutor:
+    """Runs pbkdf2 hashing in a process pool so request threads don't hold the GIL.
+
+    At most `max_pending` hashes may be queued or running at once; anything
+    beyond that is rejected immediately with HashingBusy instead of waiting.
+    A hash given up on after `timeout` keeps its slot until its process is
+    really done with it. With `workers=0` hashing runs inline (useful for
+    development).
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=None, iterations=DEFAULT_ITERATIONS):
+        self.workers = (cpu_count() or 1) if workers is None else workers
+        self.iterations = iterations
+        self.method = f'pbkdf2:sha256:{iterations}'
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(self.max_pending)
+        self._lock = Lock()
+        self._pool = None
+        self._pid = None
+
+        # metrics
+        self._pending = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._broken = 0
+        self._count = 0
+        self._total_time = 0.0
+        self._max_time = 0.0
+
+    @classmethod
+    def from_env(cls):
+        # Every gunicorn worker has its own pool, so by default they split the cores between them
+        workers = environ.get('HASH_WORKERS') or max((cpu_count() or 1) // int(environ.get('WEB_CONCURRENCY', 1)), 1)
+        max_pending = environ.get('HASH_QUEUE_SIZE')
+        timeout = environ.get('HASH_TIMEOUT')
+
+        # An explicit cost wins, otherwise measure what fits the latency budget (once per environment)
+        iterations = calibrate_env()
+        iterations = int(iterations) if iterations else DEFAULT_ITERATIONS
+
+        return cls(workers=int(workers),
+                   max_pending=int(max_pending) if max_pending else None,
+                   timeout=float(timeout) if timeout else None,
+                   iterations=iterations)
+
+    def _get_pool(self):
+        # The pool is created lazily and per process, so a gunicorn master that
+        # imported the app with --preload never hands its pool to a forked worker
+        with self._lock:
+            if self._pool is None or self._pid != getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = getpid()
+            return self._pool
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingBusy()
+
+        with self._lock:
+            self._pending += 1
+        return time.perf_counter()
+
+    def _release(self, start):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._pending -= 1
+            self._count += 1
+            self._total_time += elapsed
+            self._max_time = max(self._max_time, elapsed)
+        self._slots.release()
+
+    @contextmanager
+    def _slot(self):
+        start = self._acquire()
+        try:
+            yield
+        finally:
+            self._release(start)
+
+    def _submit(self, fn, *calls):
+        """Submit fn(*args) for each args in `calls` under one slot, returns (pool, futures).
+
+        The slot is only released once every future is done, so hashes still
+        running after a timeout are not handed a new request's slot on top.
+        """
+        start = self._acquire()
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(fn, *args) for args in calls]
+        except BrokenProcessPool:
+            self._release(start)
+            self._discard_pool(pool)
+            raise HashingBusy()
+        except BaseException:
+            self._release(start)
+            raise
+
+        remaining = [len(futures)]
+
+        def done(future):
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self._release(start)
+
+        for future in futures:
+            future.add_done_callback(done)
+        return pool, futures
+
+    def _discard_pool(self, pool):
+        # A child died (e.g. OOM killer) and the pool refuses all work, the next call builds a new one
+        with self._lock:
+            self._broken += 1
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _timed_out(self, futures):
+        for future in futures:
+            future.cancel()  # only stops hashes that haven't started yet
+        with self._lock:
+            self._timeouts += 1
+        return HashingBusy()
+
+    def _results(self, fn, *calls):
+        pool, futures = self._submit(fn, *calls)
+        _, not_done = wait(futures, timeout=self.timeout)
+        if not_done:
+            raise self._timed_out(futures)
+        try:
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise HashingBusy()
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            with self._slot():
+                return fn(*args)
+        return self._results(fn, args)[0]
+
+    def generate(self, password):
+        return self._run(_hash_pbkdf2, password, self.method)
+
+    async def _run_async(self, fn, *args):
+        # Same slots and metrics, but awaits the pool instead of blocking a thread
+        if self.workers == 0:
+            with self._slot():
+                return fn(*args)
+        pool, (future,) = self._submit(fn, args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out([future])
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise HashingBusy()
+
+    async def generate_async(self, password):
+        return await self._run_async(_hash_pbkdf2, password, self.method)
+
+    async def check_async(self, pwhash, password):
+        return await self._run_async(check_password_hash, pwhash, password)
+
+    def generate_many(self, passwords):
+        # One slot for the whole batch, the hashes are spread over every process
+        if not passwords:
+            return []
+        if self.workers == 0:
+            with self._slot():
+                return _hash_many(passwords, self.method)
+        size = max(len(passwords) // self.workers, 1)
+        chunks = [(passwords[i:i + size], self.method) for i in range(0, len(passwords), size)]
+        return [pwhash for chunk in self._results(_hash_many, *chunks) for pwhash in chunk]
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        # Only upgrades: a hash stronger than the target is kept as it is
+        iterations = hash_iterations(pwhash)
+        return iterations is None or iterations < self.iterations
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'iterations': self.iterations,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'broken_pools': self._broken,
+                'count': self._count,
+                'total_time': self._total_time,
+                'avg_time': self._total_time / self._count if self._count else 0.0,
+                'max_time': self._max_time,
+            }
+
+    def metric_lines(self):
+        stats = self.stats()
+        return [
+            '# TYPE password_hash_pending gauge',
+            f'password_hash_pending {stats["pending"]}',
+            '# TYPE password_hash_max_pending gauge',
+            f'password_hash_max_pending {stats["max_pending"]}',
+            '# TYPE password_hash_rejected_total counter',
+            f'password_hash_rejected_total {stats["rejected"]}',
+            '# TYPE password_hash_timeouts_total counter',
+            f'password_hash_timeouts_total {stats["timeouts"]}',
+            '# TYPE password_hash_broken_pools_total counter',
+            f'password_hash_broken_pools_total {stats["broken_pools"]}',
+            '# TYPE password_hash_seconds summary',
+            f'password_hash_seconds_sum {stats["total_time"]}',
+            f'password_hash_seconds_count {stats["count"]}',
+        ]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pid == getpid():
+                self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+hasher = HashingExecutor.from_env()
@@ -0,0 +1,149 @@
+from flask import request, g, Response
+from pymongo import monitoring
+from threading import Lock, local
+from collections import defaultdict
+import time
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # not cumulative, summed up on export
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Per-endpoint request metrics, exported in the Prometheus text format.
+
+    mode 'basic' records request latency, status codes and in-flight requests.
+    mode 'full' also times every MongoDB command through a pymongo listener.
+    mode 'off' records nothing.
+    """
+
+    def __init__(self, mode='basic'):
+        self.mode = mode
+        self._lock = Lock()
+        self._local = local()  # Mongo counters of the request running in this thread
+        self.latency = defaultdict(Histogram)  # (endpoint, method): Histogram
+        self.responses = defaultdict(int)  # (endpoint, method, status): count
+        self.in_flight = defaultdict(int)  # endpoint: count
+        self.mongo_latency = defaultdict(Histogram)  # command: Histogram
+        self.mongo_per_request = defaultdict(lambda: Histogram((0, 1, 2, 3, 5, 10, 25)))  # endpoint: queries per request
+        self.mongo_time = defaultdict(float)  # endpoint: seconds spent in Mongo
+        self.collectors = []  # callables returning extra exposition lines
+
+    def init_app(self, app):
+        if self.mode == 'off':
+            return
+
+        if self.mode == 'full':
+            monitoring.register(MongoCommandListener(self))  # only affects clients created afterwards
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_response)
+        app.teardown_request(self._end_request)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+
+    def _start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_endpoint = request.endpoint or 'unknown'
+        self._local.queries = 0
+        self._local.mongo_time = 0.0
+        with self._lock:
+            self.in_flight[g.metrics_endpoint] += 1
+
+    def _record_response(self, response):
+        if 'metrics_start' not in g:
+            return response
+
+        elapsed = time.perf_counter() - g.metrics_start
+        endpoint = g.metrics_endpoint
+        with self._lock:
+            self.latency[(endpoint, request.method)].observe(elapsed)
+            self.responses[(endpoint, request.method, response.status_code)] += 1
+            if self.mode == 'full':
+                self.mongo_per_request[endpoint].observe(self._local.queries)
+                self.mongo_time[endpoint] += self._local.mongo_time
+        return response
+
+    def _end_request(self, exc):
+        if 'metrics_endpoint' in g:
+            with self._lock:
+                self.in_flight[g.metrics_endpoint] -= 1
+
+    def record_command(self, command, duration):
+        self._local.queries = getattr(self._local, 'queries', 0) + 1
+        self._local.mongo_time = getattr(self._local, 'mongo_time', 0.0) + duration
+        with self._lock:
+            self.mongo_latency[command].observe(duration)
+
+    def export(self):
+        lines = []
+        with self._lock:
+            _histogram(lines, 'http_request_duration_seconds', 'Request latency by endpoint',
+                       ('endpoint', 'method'), self.latency)
+            lines.append('# HELP http_responses_total Responses by endpoint and status')
+            lines.append('# TYPE http_responses_total counter')
+            for (endpoint, method, status), count in self.responses.items():
+                lines.append(f'http_responses_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            lines.append('# HELP http_requests_in_flight Requests currently being served')
+            lines.append('# TYPE http_requests_in_flight gauge')
+            for endpoint, count in self.in_flight.items():
+                lines.append(f'http_requests_in_flight{{endpoint="{endpoint}"}} {count}')
+
+            if self.mode == 'full':
+                _histogram(lines, 'mongo_command_duration_seconds', 'MongoDB command latency',
+                           ('command',), self.mongo_latency)
+                _histogram(lines, 'mongo_commands_per_request', 'MongoDB commands issued per request',
+                           ('endpoint',), self.mongo_per_request)
+                lines.append('# HELP mongo_seconds_total Time spent in MongoDB by endpoint')
+                lines.append('# TYPE mongo_seconds_total counter')
+                for endpoint, seconds in self.mongo_time.items():
+                    lines.append(f'mongo_seconds_total{{endpoint="{endpoint}"}} {seconds}')
+
+        for collector in self.collectors:
+            lines.extend(collector())
+
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times commands; pymongo calls these in the thread that runs the command."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.metrics.record_command(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.metrics.record_command(event.command_name, event.duration_micros / 1e6)
+
+
+def _histogram(lines, name, help_text, labels, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in histograms.items():
+        key = key if isinstance(key, tuple) else (key,)
+        label = ','.join(f'{label}="{value}"' for label, value in zip(labels, key))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+        lines.append(f'{name}_count{{{label}}} {histogram.count}')
@@ -0,0 +1,58 @@
+"""Creates the User indexes, run it before starting a new version of the app.
+
+Usage: MONGO_URL=... MONGO_DB=... python -m core.migrate
+
+The app never builds indexes itself (auto_create_index is off on User), so a
+failed build can't break requests. The case-insensitive unique indexes
+(username_ci, email_ci) can only be built once no two users share a username
+or an email in different letter case. Those collisions are listed and
+nothing is changed until they are resolved. The new indexes are built before
+the old case-sensitive ones (username_1, email_1) are dropped, so uniqueness
+holds throughout. Running it again is a no-op.
+"""
+import sys
+from core import db
+from core.db import init_db
+from core.models.user import User, CASE_INSENSITIVE
+
+# Unique indexes from before usernames and emails matched case-insensitively
+LEGACY_INDEXES = ('username_1', 'email_1')
+
+
+def case_collisions(collection, field):
+    """{value: [_id, ...]} for every `field` value shared by several users, ignoring case."""
+    pipeline = [
+        {'$group': {'_id': f'${field}' if db.supports_collation else {'$toLower': f'${field}'},
+                    'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}},
+    ]
+    options = {'collation': CASE_INSENSITIVE} if db.supports_collation else {}  # $group honours the collation
+    return {group['_id']: group['ids'] for group in collection.aggregate(pipeline, **options)}
+
+
+def migrate_user_indexes(log=print):
+    """Build the User indexes and drop the legacy ones, returns False when collisions block it."""
+    init_db()
+    collection = User._get_collection()
+
+    blocked = False
+    for field in ('username', 'email'):
+        for value, ids in case_collisions(collection, field).items():
+            log(f"{field} {value!r} is used by {len(ids)} users: {', '.join(str(user_id) for user_id in ids)}")
+            blocked = True
+    if blocked:
+        log("Rename or merge these users so each value is unique ignoring case, then run this again")
+        return False
+
+    User.ensure_indexes()
+    existing = collection.index_information()
+    for name in LEGACY_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+            log(f"Dropped legacy index {name}")
+    log(f"User indexes: {', '.join(sorted(collection.index_information()))}")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if migrate_user_indexes() else 1)
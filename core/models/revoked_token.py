@@ -0,0 +1,14 @@
+from mongoengine import Document, StringField, DateTimeField
+from datetime import datetime
+
+class RevokedToken(Document):
+    jti = StringField(required=True, unique=True)
+    exp = DateTimeField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)  # set by the server in TokenBlocklist.revoke
+
+    meta = {
+        'indexes': [
+            {'fields': ['exp'], 'expireAfterSeconds': 0},  # Mongo drops the entry once the token has expired anyway
+            'created_at',  # incremental pulls in TokenBlocklist.refresh
+        ]
+    }
@@ -1,29 +1,132 @@
-from mongoengine import Document, StringField, DateTimeField, signals
+from mongoengine import Document, StringField, DateTimeField, IntField, Q, ValidationError, signals
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+import re
+from core.hashing import hasher, HashingBusy
+from core import db
+
+# Case-insensitive comparison, "John" and "john" are the same username
+CASE_INSENSITIVE = {'locale': 'en', 'strength': 2}
 
 class User(Document):
-    username = StringField(required=True, unique=True)
+    username = StringField(required=True)
     password = StringField(required=True)
-    email = StringField(required=True, unique=True)
+    email = StringField(required=True)
+    profile_version = IntField(default=0)  # bumped whenever username/email change
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
 
+    meta = {
+        'auto_create_index': False,  # built by python -m core.migrate, never from a request
+        'indexes': [
+            # Unique indexes reject duplicates in the insert itself instead of a pre-check query
+            {'fields': ['username'], 'unique': True, 'collation': CASE_INSENSITIVE, 'name': 'username_ci'},
+            {'fields': ['email'], 'unique': True, 'collation': CASE_INSENSITIVE, 'name': 'email_ci'},
+            ('created_at', 'id'),  # keyset pagination in User.page
+            'updated_at',  # incremental refresh of the availability Bloom filter
+        ]
+    }
+
     def save(self, *args, **kwargs):
         self.updated_at = datetime.utcnow()
         return super(User, self).save(*args, **kwargs)
     
 
+    def registration_error(self):
+        """Why /register must reject this user, None when it can be stored.
+
+        Shared by the Flask and the ASGI app, which inserts without save() and
+        so without mongoengine's validation. Empty values count as missing.
+        """
+        if not self.username or not self.password or not self.email:
+            return "Missing username, password, or email"
+        try:
+            self.validate()
+        except ValidationError as e:
+            return f"Invalid {', '.join(sorted(e.errors or {})) or 'user'}"
+        return None
+
+
+    @classmethod
+    def query(cls, **kwargs):
+        """cls.objects(**kwargs), matching username and email case-insensitively so the _ci indexes are used."""
+        query = cls.objects(**kwargs)
+        if ('username' in kwargs or 'email' in kwargs) and db.supports_collation:
+            query = query.collation(CASE_INSENSITIVE)
+        return query
+
+
     @classmethod
     def find_one(cls, **kwargs):
         if 'password' in kwargs:
             del kwargs['password']  # Do not use password in these queries
-        return cls.objects(**kwargs).first()
+        return cls.query(**kwargs).first()
+
+
+    @classmethod
+    def find_fields(cls, fields, raw=False, **kwargs):
+        """Like find_one but only loads `fields`, never the password hash.
+
+        With raw=True the match is returned as a plain dict instead of a
+        hydrated Document, which is much cheaper for read-only routes.
+        """
+        if 'password' in kwargs:
+            del kwargs['password']
+        query = cls.query(**kwargs).only(*[field for field in fields if field != 'password'])
+        if raw:
+            query = query.as_pymongo()
+        return query.first()
+
+
+    @classmethod
+    def page(cls, fields, after=None, limit=50):
+        """Raw dicts of the next `limit` users ordered by (created_at, _id).
+
+        `after` is the (created_at, _id) of the last user of the previous page.
+        The compound index makes every page cost the same, however deep it is.
+        """
+        query = cls.objects
+        if after is not None:
+            created_at, last_id = after
+            query = query.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=last_id))
+        fields = [field for field in fields if field != 'password']
+        return list(query.order_by('created_at', 'id').only('created_at', *fields).limit(limit).as_pymongo())
+
+
+    @classmethod
+    def find_many(cls, fields, ids=(), usernames=()):
+        """Raw dicts of the users matching any of `ids` or `usernames`, in one $in query."""
+        query = Q(id__in=list(ids)) | Q(username__in=list(usernames))
+        fields = [field for field in fields if field != 'password']
+        users = cls.objects(query).only('username', *fields).as_pymongo()
+        if usernames and db.supports_collation:
+            users = users.collation(CASE_INSENSITIVE)  # so the username_ci index is used
+        return list(users)
+
+
+    @classmethod
+    def upgrade_password(cls, user_id, old_hash, password):
+        """Rehash a verified password with the current cost, unless it changed meanwhile."""
+        try:
+            new_hash = hasher.generate(password)
+        except HashingBusy:
+            return  # try again on the next login
+        cls.objects(id=user_id, password=old_hash).update_one(set__password=new_hash)
+
+
+    @staticmethod
+    def duplicate_field(error):
+        """Name of the field whose unique index rejected a write, taken from the E11000 message."""
+        match = re.search(r'index: (\w+?)_(?:ci|-?\d)', str(error))
+        return match.group(1) if match else None
     
 
+def needs_hashing(password):
+    return bool(password) and not password.startswith('pbkdf2:sha256')
+
+
 def generate_password(sender, document, **kwargs):  
-    if document.password and not document.password.startswith('pbkdf2:sha256'):  
-        document.password = generate_password_hash(document.password, method='pbkdf2:sha256')
+    if needs_hashing(document.password):  
+        document.password = hasher.generate(document.password)  # hashed in the process pool
 
     
 def set_update_time(sender, document, **kwargs):  
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from pymongo import ReturnDocument
+from mongoengine import get_db
+from os import environ
+import math
+import time
+
+
+class TokenBucketLimiter:
+    """In-process token buckets, one per key.
+
+    Keys are spread over `shards` independently locked LRU maps so concurrent
+    requests rarely contend. Buckets refill lazily when they are looked at, and
+    the least recently used ones are dropped once a shard holds `max_keys`.
+    """
+
+    def __init__(self, rate, burst, shards=16, max_keys=10000):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.retry_after = math.ceil(1 / rate)  # seconds until the next token
+        self._shards = [(Lock(), OrderedDict()) for _ in range(shards)]
+        self._max_keys = max(max_keys // shards, 1)
+
+    def allow(self, key):
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+
+        with lock:
+            tokens, last = buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            buckets[key] = (tokens, now)  # (re)inserted as most recently used
+            if len(buckets) > self._max_keys:
+                buckets.popitem(last=False)
+
+        return allowed
+
+
+class MongoRateLimiter:
+    """Fixed-window counters shared by every worker through MongoDB.
+
+    Costs one atomic update per check, in exchange limits hold across
+    gunicorn workers and hosts. Old windows are removed by a TTL index.
+    """
+
+    def __init__(self, rate, burst, collection='rate_limit'):
+        self.window = max(burst / rate, 1)  # seconds to earn a full burst back
+        self.limit = burst
+        self.retry_after = math.ceil(self.window)
+        self.collection_name = collection
+        self._collection = None
+
+    def _get_collection(self):
+        if self._collection is None:
+            self._collection = get_db()[self.collection_name]
+            self._collection.create_index('expires', expireAfterSeconds=0)
+        return self._collection
+
+    def allow(self, key):
+        window = int(time.time() // self.window)
+        counter = self._get_collection().find_one_and_update(
+            {'_id': f'{key}:{window}'},
+            {'$inc': {'n': 1}, '$setOnInsert': {'expires': datetime.utcnow() + timedelta(seconds=self.window)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter['n'] <= self.limit
+
+
+def login_keys(client_ip, username):
+    """Limiter keys of a login attempt, checked in this order.
+
+    Usernames match case-insensitively (see CASE_INSENSITIVE in the User model),
+    so every spelling of a name has to share one bucket.
+    """
+    return f'ip:{client_ip}', f'user:{username.casefold() if username is not None else None}'
+
+
+def create_limiter(backend, rate, burst):
+    if backend == 'mongo':
+        return MongoRateLimiter(rate, burst)
+    return TokenBucketLimiter(rate, burst)
+
+
+# Login attempts, checked per username and per client IP before any hashing
+login_limiter = create_limiter(environ.get('RATE_LIMIT_BACKEND', 'memory'),
+                               rate=float(environ.get('LOGIN_RATE_PER_MINUTE', 10)) / 60,
+                               burst=int(environ.get('LOGIN_RATE_BURST', 5)))
@@ -1,17 +1,52 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash, generate_password_hash
-from core.models.user import User
-from mongoengine import connect
+from flask import Blueprint, request, current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
+from flask_jwt_extended.exceptions import WrongTokenError
+from core.models.user import User, needs_hashing
+from core.serialization import jsonify
+from core.decorators import admin_required
+from core.hashing import hasher, HashingBusy
+from core.blocklist import blocklist
+from core.ratelimit import login_limiter, login_keys
+from core.availability import taken_names
+from core.cache import TTLCache
+from mongoengine import NotUniqueError, ValidationError
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
 from os import environ
+import base64
+import json
 
 bp = Blueprint('user_routes', __name__)
 
-mongo_url = environ.get('MONGO_URL', 'mongodb://localhost:27017')
-database_name = environ.get('MONGO_DB', 'ggame')
+# Recently looked up users by 'id:<id>' / 'username:<lowercased name>', for /users/lookup
+lookup_cache = TTLCache(maxsize=int(environ.get('LOOKUP_CACHE_SIZE', 10000)),
+                        ttl=float(environ.get('LOOKUP_CACHE_TTL', 5)))
 
-connect(db=database_name, host=mongo_url, alias="default")
+# Profile version read from the database by 'id', profile claims older than it are not trusted.
+# A rename made through another worker is noticed once the entry expires
+profile_versions = TTLCache(maxsize=int(environ.get('PROFILE_VERSION_CACHE_SIZE', 10000)),
+                            ttl=float(environ.get('PROFILE_VERSION_CACHE_TTL', 5)))
+
+
+def create_user_token(user):
+    user_id_str = str(user.id)  # Convert the ObjectId to a string
+
+    if not current_app.config['JWT_PROFILE_CLAIMS']:
+        return create_access_token(identity=user_id_str)
+
+    profile_versions.set(user_id_str, user.profile_version)
+    claims = {"profile": {"v": user.profile_version, "username": user.username, "email": user.email}}
+    return create_access_token(identity=user_id_str, additional_claims=claims)
+
+
+@bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    # All hashing slots are taken, tell the client to back off instead of queueing
+    response = jsonify({"msg": "Server is busy, try again later"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 
 @bp.route('/register', methods=['POST'])
@@ -19,37 +54,85 @@ def register():
     username = request.form.get('username', None)
     email = request.form.get('email', None)
     password = request.form.get('password', None)
-    
-    if username is None or password is None or email is None:
-        return jsonify({"msg": "Missing username, password, or email"}), 400
-    
-    if User.find_one(username=username) is not None:    # Checking if the username already exists
-        return jsonify({"msg": "Username already exists"}), 400
-    
-    if User.find_one(email=email) is not None:  # Checking if the email already exists
-        return jsonify({"msg": "Email already exists"}), 400
-    
+
     user = User(username=username, password=password, email=email)
-    user.save()
+    error = user.registration_error()
+    if error:
+        return jsonify({"msg": error}), 400
+
+    try:
+        user.save()  # a single insert, the unique indexes reject taken usernames and emails
+    except (NotUniqueError, DuplicateKeyError) as e:
+        if User.duplicate_field(e) == 'email':
+            return jsonify({"msg": "Email already exists"}), 400
+        return jsonify({"msg": "Username already exists"}), 400
     
     return jsonify({'result': 'ok'}), 201
 
 
 
+@bp.route('/username-available', methods=['GET'])
+def username_available():
+    names = {field: request.args.get(field) for field in ('username', 'email') if request.args.get(field)}
+    if not names:
+        return jsonify({"msg": "Missing username or email"}), 400
+
+    for field, name in names.items():
+        if not taken_names.might_be_taken(name):
+            continue  # definitely free, no query needed
+
+        if User.find_fields(('id',), raw=True, **{field: name}) is not None:
+            return jsonify({"available": False}), 200
+
+    return jsonify({"available": True}), 200
+
+
+
 @bp.route('/login', methods=['POST'])
 def login():
     username = request.form.get('username', None)
     password = request.form.get('password', None)
 
+    # Checked before the lookup and the hash, so rejected attempts cost almost nothing
+    if not all(login_limiter.allow(key) for key in login_keys(request.remote_addr, username)):
+        response = jsonify({"msg": "Too many login attempts, try again later"})
+        response.headers['Retry-After'] = str(login_limiter.retry_after)
+        return response, 429
+
     user = User.find_one(username=username)
 
-    if user is None or not check_password_hash(user.password, password):  # Password verification
+    if user is None or not hasher.check(user.password, password):  # Password verification
         return jsonify({"msg": "Bad username or password"}), 401
 
-    # Convert the ObjectId to a string
-    user_id_str = str(user.id)
+    response = jsonify(access_token=create_user_token(user), refresh_token=create_refresh_token(identity=str(user.id)))
+
+    # Stored with a different cost than the current target, upgrade it once the response is sent
+    if hasher.needs_rehash(user.password):
+        response.call_on_close(lambda: User.upgrade_password(user.id, user.password, password))
+
+    return response, 200
+
+
 
-    return jsonify(access_token=create_access_token(identity=user_id_str)), 200
+@bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)  # Only refresh tokens are accepted here
+def refresh():
+    identity = get_jwt_identity()
+    token = get_jwt()
+
+    # Rotate: the refresh token can only be used once, even by concurrent requests
+    if not blocklist.revoke(token['jti'], token['exp']):
+        return jsonify({"msg": "Token has been revoked"}), 401
+
+    if current_app.config['JWT_PROFILE_CLAIMS']:
+        user = User.find_fields(('username', 'email', 'profile_version'), id=ObjectId(identity))
+        if not user:
+            return jsonify({"msg": "User not found"}), 404
+        access_token = create_user_token(user)
+    else:
+        access_token = create_access_token(identity=identity)
+
+    return jsonify(access_token=access_token, refresh_token=create_refresh_token(identity=identity)), 200
 
 
 
@@ -57,16 +140,33 @@ def login():
 @jwt_required()  # Verify that the user is logged in
 def check_auth():
     identity = get_jwt_identity()
-    user = User.find_one(id=ObjectId(identity))
+
+    # Answer from the token itself while its profile is known to be current
+    profile = get_jwt().get('profile')
+    if profile is not None:
+        version = profile_versions.get(identity)
+        if version is not None and profile['v'] >= version:
+            return jsonify({"username": profile['username'], "email": profile['email']}), 200
+
+    user = User.find_fields(('username', 'email', 'profile_version'), raw=True, id=ObjectId(identity))
     if not user:
         return jsonify({"msg": "User not found"}), 404
-    return jsonify({"username": user.username, "email": user.email}), 200
+    profile_versions.set(identity, user.get('profile_version', 0))
+    return jsonify({"username": user['username'], "email": user['email']}), 200
 
 
 
 @bp.route('/logout', methods=['POST'])
-@jwt_required()  # Verify that the user is logged in
 def logout():
+    # Accepts access or refresh tokens, whichever should be revoked
+    # (jwt_required(verify_type=False) needs flask_jwt_extended 4.4, requirements.txt pins 4.3.1)
+    try:
+        verify_jwt_in_request()
+    except WrongTokenError:
+        verify_jwt_in_request(refresh=True)
+
+    token = get_jwt()
+    blocklist.revoke(token['jti'], token['exp'])  # token is rejected from now on
     return jsonify({"msg": "Successfully logged out"}), 200
 
 
@@ -78,14 +178,205 @@ def update_profile():
 
     current_identity = get_jwt_identity()
 
-    current_user = User.find_one(id=ObjectId(current_identity))
-
+    changes = {'set__updated_at': datetime.utcnow()}
     if new_username is not None:
-        if User.find_one(username=new_username):
-            return jsonify({"msg": "Desired username has already been taken"}), 400
+        changes['set__username'] = new_username
+        changes['inc__profile_version'] = 1  # invalidates profile claims in older tokens
+
+    # One atomic update, the unique index rejects a username that is already taken
+    try:
+        current_user = User.objects(id=ObjectId(current_identity)).modify(new=True, **changes)
+    except (NotUniqueError, DuplicateKeyError):
+        return jsonify({"msg": "Desired username has already been taken"}), 400
+
+    if current_user is None:
+        return jsonify({"msg": "User not found"}), 404
+
+    taken_names.add(new_username)  # modify() bypasses the post_save signal
+
+    if current_app.config['JWT_PROFILE_CLAIMS']:
+        return jsonify({"msg": "Profile updated successfully!", "access_token": create_user_token(current_user)}), 200
+
+    return jsonify({"msg": "Profile updated successfully!"}), 200
+
+
+
+def insert_users(rows):
+    """Insert (line, User) pairs with one insert_many, returns (inserted, errors)."""
+    users = [user for _, user in rows]
+
+    # Same rules as the pre_save hook: only plain text passwords get hashed
+    plain = [user for user in users if needs_hashing(user.password)]
+    for user, pwhash in zip(plain, hasher.generate_many([user.password for user in plain])):
+        user.password = pwhash
+
+    now = datetime.utcnow()
+    for user in users:
+        user.updated_at = now
+
+    try:
+        result = User._get_collection().insert_many([user.to_mongo() for user in users], ordered=False)
+        return len(result.inserted_ids), []
+    except BulkWriteError as e:
+        return e.details['nInserted'], bulk_errors(rows, e)
+    finally:
+        for user in users:  # insert_many bypasses the post_save signal, failed rows are a harmless false positive
+            taken_names.add(user.username, user.email)
+
+
+def bulk_errors(rows, e):
+    errors = []
+    for error in e.details['writeErrors']:
+        line = rows[error['index']][0]
+        if error['code'] == 11000:
+            errors.append({"line": line, "msg": f"{(User.duplicate_field(error['errmsg']) or 'user').capitalize()} already exists"})
+        else:
+            errors.append({"line": line, "msg": error['errmsg']})
+    return errors
+
+
+
+def bulk_busy(inserted, errors, first_line, lines, last_line):
+    """503 for a bulk import that stopped at `first_line`: what was inserted and which lines to send again."""
+    for last_line, _ in lines:  # the rest of the body is only counted, not parsed
+        pass
+    response = jsonify({
+        "msg": "Server is busy, try again later",
+        "inserted": inserted,
+        "errors": sorted((error for error in errors if error['line'] < first_line), key=lambda error: error['line']),
+        "remaining": {"from": first_line, "to": last_line},
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+
+@bp.route('/users/bulk', methods=['POST'])
+@admin_required
+def bulk_import():
+    # Body is NDJSON, one {"username", "email", "password"} object per line
+    batch_size = current_app.config['BULK_BATCH_SIZE']
+    inserted = 0
+    errors = []
+    batch = []
+    line = 0
+
+    lines = enumerate(request.stream, 1)
+    for line, raw in lines:
+        if not raw.strip():
+            continue
+
+        try:
+            data = json.loads(raw)
+            user = User(username=data.get('username'), password=data.get('password'), email=data.get('email'))
+            user.validate()
+        except (ValueError, AttributeError):
+            errors.append({"line": line, "msg": "Invalid JSON object"})
+            continue
+        except ValidationError:
+            errors.append({"line": line, "msg": "Missing username, password, or email"})
+            continue
+
+        batch.append((line, user))
+        if len(batch) >= batch_size:
+            try:
+                count, batch_errors = insert_users(batch)
+            except HashingBusy:  # earlier batches are already committed, stop here and say so
+                return bulk_busy(inserted, errors, batch[0][0], lines, line)
+            inserted += count
+            errors.extend(batch_errors)
+            batch = []
+
+    if batch:
+        try:
+            count, batch_errors = insert_users(batch)
+        except HashingBusy:
+            return bulk_busy(inserted, errors, batch[0][0], lines, line)
+        inserted += count
+        errors.extend(batch_errors)
+
+    errors.sort(key=lambda error: error['line'])
+    return jsonify({"inserted": inserted, "errors": errors}), 200
+
+
+
+
+def encode_cursor(user):
+    raw = f"{user['created_at'].isoformat()}|{user['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    created_at, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), ObjectId(user_id)
+
+
+
+@bp.route('/users', methods=['GET'])
+@admin_required
+def list_users():
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    cursor = request.args.get('cursor', None)
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except (ValueError, InvalidId):
+        return jsonify({"msg": "Invalid cursor"}), 400
+
+    users = User.page(('username', 'email'), after=after, limit=limit + 1)  # one extra to know if there is a next page
+    next_cursor = encode_cursor(users[limit - 1]) if len(users) > limit else None
+    users = users[:limit]
+
+    return jsonify({
+        "users": [
+            {"id": str(user['_id']), "username": user['username'], "email": user['email'], "created_at": user['created_at'].isoformat()}
+            for user in users
+        ],
+        "next_cursor": next_cursor,
+    }), 200
+
+
+
+
+@bp.route('/users/lookup', methods=['POST'])
+@admin_required
+def lookup_users():
+    # JSON body: {"ids": [...], "usernames": [...]}
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"msg": "Body must be a JSON object with ids and/or usernames"}), 400
+    ids = data.get('ids') or []
+    usernames = data.get('usernames') or []
+
+    if not all(isinstance(keys, list) and all(isinstance(key, str) for key in keys) for keys in (ids, usernames)):
+        return jsonify({"msg": "ids and usernames must be lists of strings"}), 400
+    if len(ids) + len(usernames) > current_app.config['LOOKUP_MAX_KEYS']:
+        return jsonify({"msg": f"At most {current_app.config['LOOKUP_MAX_KEYS']} ids and usernames per request"}), 400
+
+    by_id = {user_id: lookup_cache.get(f'id:{user_id}') for user_id in ids}
+    by_username = {username: lookup_cache.get(f'username:{username.lower()}') for username in usernames}
+
+    # Only what the cache didn't have goes to the database
+    # Several requested keys can name the same user ("Bob" and "bob"), each one gets filled
+    missing_ids = {}  # ObjectId: [requested ids]
+    for user_id, user in by_id.items():
+        if user is None and ObjectId.is_valid(user_id):
+            missing_ids.setdefault(ObjectId(user_id), []).append(user_id)
+    missing_usernames = {}  # lowercased username: [requested usernames]
+    for username, user in by_username.items():
+        if user is None:
+            missing_usernames.setdefault(username.lower(), []).append(username)
 
-        current_user.username = new_username
+    if missing_ids or missing_usernames:
+        requested = [username for names in missing_usernames.values() for username in names]
+        for doc in User.find_many(('email',), ids=missing_ids, usernames=requested):
+            user = {"id": str(doc['_id']), "username": doc['username'], "email": doc['email']}
+            lookup_cache.set(f"id:{user['id']}", user)
+            lookup_cache.set(f"username:{user['username'].lower()}", user)
 
-    current_user.save()
+            for user_id in missing_ids.get(doc['_id'], ()):
+                by_id[user_id] = user
+            for username in missing_usernames.get(user['username'].lower(), ()):
+                by_username[username] = user
 
-    return jsonify({"msg": "Profile updated successfully!"}), 200
\ No newline at end of file
+    return jsonify({"ids": by_id, "usernames": by_username}), 200
@@ -0,0 +1,156 @@
+import discord
+from discord.ext import commands
+from datetime import datetime
+import time
+import os
+from bot_logging import get_logger
+from permissions import require, STAFF
+
+logger = get_logger('extensions')
+
+# Módulos de los sistemas, en orden de carga (auto_warning_system usa el WarningSystem ya cargado)
+EXTENSIONS = [
+    'bot_commands', 'whitelist_system', 'reaction_logger', 'warn_system',
+    'job_system', 'rating_system', 'suggestion_system', 'warning_system',
+    'staff_accept_system', 'activity_check_system', 'auto_warning_system',
+    'register_instagram', 'anonymous_system', 'historial_user', 'system_ck',
+    'whitelist_schedule_system', 'global_ban_system', 'radio_system'
+]
+
+
+def configured_extensions():
+    """Extensiones de este despliegue, BOT_EXTENSIONS=mod1,mod2 reemplaza la lista"""
+    names = os.getenv('BOT_EXTENSIONS')
+    if not names:
+        return EXTENSIONS
+    return [name.strip() for name in names.split(',') if name.strip()]
+
+
+def rss_mb():
+    """Memoria residente actual del proceso en MB (None fuera de Linux)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return None
+
+
+def rss_delta(before):
+    after = rss_mb()
+    return round(after - before, 2) if after is not None and before is not None else None
+
+
+class ExtensionManager:
+    """Carga los sistemas como extensiones de discord.py y los recarga sin reiniciar el bot"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.bot.systems = {}  # nombre: instancia, lo llena el setup() de cada extensión
+        self.load_stats = {}  # módulo: {"ms": ..., "rss_delta_mb": ...}
+        self.setup_commands()
+
+    def configured(self):
+        return configured_extensions()
+
+    async def load_all(self):
+        """Cargar las extensiones configuradas, un fallo no impide cargar las demás"""
+        started = time.perf_counter()
+        rss_before = rss_mb()
+        for name in self.configured():
+            await self.load(name)
+        logger.info("✅ Extensiones cargadas",
+                    extra={
+                        "loaded": len(self.load_stats),
+                        "configured": len(self.configured()),
+                        "ms": round((time.perf_counter() - started) * 1000, 1),
+                        "rss_mb": rss_mb(),
+                        "rss_delta_mb": rss_delta(rss_before)
+                    })
+
+    async def load(self, name):
+        started = time.perf_counter()
+        rss_before = rss_mb()
+        try:
+            await self.bot.load_extension(name)
+        except commands.ExtensionError as e:
+            logger.error(f"❌ No se pudo cargar la extensión {name}: {e}")
+            return False
+        self.load_stats[name] = {
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "rss_delta_mb": rss_delta(rss_before)
+        }
+        logger.info(f"Extensión {name} cargada", extra={"extension": name, **self.load_stats[name]})
+        return True
+
+    def resolve(self, name):
+        """'radio' o 'radio_system' -> 'radio_system'"""
+        for candidate in (name, f'{name}_system'):
+            if candidate in self.configured():
+                return candidate
+        return None
+
+    def setup_commands(self):
+        """Configurar comandos pc!reload y pc!extensiones"""
+
+        @self.bot.command(name='reload')
+        @require(STAFF)
+        async def reload_command(ctx, system: str):
+            """Recargar (o cargar) un sistema sin reconectar al gateway"""
+            name = self.resolve(system)
+            if name is None:
+                embed = discord.Embed(
+                    title="❌ Sistema no encontrado",
+                    description=f"`{system}` no está en la lista de extensiones. Usa `pc!extensiones` para verlas.",
+                    color=discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+
+            started = time.perf_counter()
+            try:
+                if name in self.bot.extensions:
+                    await self.bot.reload_extension(name)  # si falla, discord.py deja la versión anterior
+                else:
+                    await self.bot.load_extension(name)
+            except commands.ExtensionError as e:
+                logger.error(f"❌ Error recargando {name}: {e}")
+                embed = discord.Embed(
+                    title="❌ Error recargando el sistema",
+                    description=f"`{name}`: {e}",
+                    color=discord.Color.red())
+                await ctx.send(embed=embed)
+                return
+
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.info(f"🔄 Extensión {name} recargada por {ctx.author}", extra={"extension": name, "ms": round(elapsed, 1)})
+            embed = discord.Embed(
+                title="🔄 Sistema recargado",
+                description=f"`{name}` recargado en {elapsed:.0f}ms",
+                color=discord.Color.green())
+            await ctx.send(embed=embed)
+
+        @self.bot.command(name='extensiones')
+        @require(STAFF)
+        async def extensions_command(ctx):
+            """Estado, tiempo de carga y memoria de cada sistema"""
+            embed = discord.Embed(
+                title="🧩 Extensiones",
+                color=discord.Color.blue(),
+                timestamp=datetime.now())
+
+            lines = []
+            for name in self.configured():
+                stats = self.load_stats.get(name)
+                if name not in self.bot.extensions:
+                    lines.append(f"❌ `{name}`")
+                elif stats is None:
+                    lines.append(f"✅ `{name}`")  # cargada después con pc!reload
+                else:
+                    memory = f", {stats['rss_delta_mb']:+.1f} MB" if stats['rss_delta_mb'] is not None else ""
+                    lines.append(f"✅ `{name}` {stats['ms']:.0f}ms{memory}")
+            embed.description = "\n".join(lines)
+
+            rss = rss_mb()
+            if rss is not None:
+                embed.add_field(name="Memoria (RSS)", value=f"{rss:.1f} MB", inline=True)
+            embed.set_footer(text="Puro Chile RP - Extensiones del bot")
+            await ctx.send(embed=embed)
@@ -0,0 +1,19 @@
+# Loaded automatically by gunicorn from the working directory
+import os
+
+
+def on_starting(server):
+    # The hash cost is calibrated once here in the master, the forked workers inherit it.
+    # Each worker gets its own hashing pool, WEB_CONCURRENCY makes them split the cores
+    os.environ.setdefault('WEB_CONCURRENCY', str(server.cfg.workers))
+    from core.hashing import hasher
+    server.log.info(f"Password hashes use {hasher.iterations} pbkdf2 iterations, "
+                    f"{hasher.workers} hashing processes per worker")
+
+
+def post_fork(server, worker):
+    # Each worker gets its own MongoDB client, connected and warmed before it takes requests
+    from core.db import init_db
+    from core.availability import taken_names
+    init_db(warm=True)
+    taken_names.load()  # build the username Bloom filter before the first request
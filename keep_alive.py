@@ -1,35 +1,104 @@
-from flask import Flask, jsonify
-from threading import Thread
+from aiohttp import web
+from collections import deque
+import statistics
+import hmac
+import asyncio
+import math
 import time
 import os
+from bot_logging import get_logger
 
-app = Flask(__name__)
+logger = get_logger('keep_alive')
 
+STARTED_AT = time.time()
+MAX_LOOP_LAG_MS = float(os.getenv('HEALTH_MAX_LOOP_LAG_MS', 1000))
 
-@app.route('/')
-def home():
+
+class LoopLagMonitor:
+    """Mide cuánto se atrasa el event loop en despertar de un sleep (ventana móvil)"""
+
+    def __init__(self, interval=0.5, window=240):
+        self.interval = interval
+        self.samples = deque(maxlen=window)  # 240 x 0.5s = últimos 2 minutos
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - start - self.interval, 0.0))
+
+    def summary(self):
+        if not self.samples:
+            return {"p50_ms": None, "p99_ms": None, "max_ms": None}
+        samples = sorted(self.samples)
+        return {
+            "p50_ms": round(statistics.median(samples) * 1000, 2),
+            "p99_ms": round(samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2)
+        }
+
+
+class GatewayState:
+    """Conexión al gateway según los eventos del bot
+
+    discord.py no limpia is_ready() al perder la conexión y is_closed() sigue en
+    False mientras reconecta, así que /health se guía por estos eventos.
+    """
+
+    def __init__(self, bot):
+        self.connected = False
+        self.changed_at = None
+        if bot is not None:
+            for event in ('on_connect', 'on_ready', 'on_resumed'):
+                bot.add_listener(self.set_connected, event)
+            bot.add_listener(self.set_disconnected, 'on_disconnect')
+
+    async def set_connected(self):
+        if not self.connected:
+            self.connected, self.changed_at = True, time.time()
+
+    async def set_disconnected(self):
+        if self.connected:
+            self.connected, self.changed_at = False, time.time()
+            logger.warning("Conexión al gateway perdida, discord.py reintenta")
+
+
+async def home(request):
     """Health check endpoint for UptimeRobot"""
-    return jsonify({
+    return web.json_response({
         "status": "alive",
         "message": "Discord Bot is running",
         "timestamp": time.time()
     })
 
 
-@app.route('/health')
-def health():
-    """Additional health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "uptime": time.time(),
+async def health(request):
+    """Additional health check endpoint, answers 503 when the bot is degraded"""
+    bot = request.app['bot']
+    lag = request.app['lag_monitor'].summary()
+    gateway = request.app['gateway']
+    connected = bot is not None and gateway.connected and not bot.is_closed()
+    latency = bot.latency if connected else None  # la del último heartbeat, vieja si no hay conexión
+
+    degraded = not connected or (lag["p99_ms"] or 0) > MAX_LOOP_LAG_MS
+    return web.json_response({
+        "status": "degraded" if degraded else "healthy",
+        "uptime": round(time.time() - STARTED_AT, 1),
+        "started_at": STARTED_AT,
+        "gateway_connected": connected,
+        "gateway_changed_at": gateway.changed_at,
+        "latency_ms": round(latency * 1000, 1) if latency is not None and math.isfinite(latency) else None,
+        "event_loop_lag": lag,
+        "working_sets": {name: size() for name, size in request.app['working_sets'].items()},
         "service": "Discord Bot - Policia Civil"
-    })
+    }, status=503 if degraded else 200)
 
 
-@app.route('/status')
-def status():
+async def status(request):
     """Bot status endpoint"""
-    return jsonify({
+    bot = request.app['bot']
+    return web.json_response({
         "bot_name":
         "Policia Civil Bot",
         "version":
@@ -40,20 +109,58 @@ def status():
             "pc!entorno - Emergency services menu",
             "pc!whitelist - Whitelist application system",
             "Reaction logging system", "24/7 uptime monitoring"
-        ]
+        ],
+        "guilds": len(bot.guilds) if bot is not None else 0,
+        "commands": len(bot.commands) if bot is not None else 0,
+        "app_commands": len(bot.tree.get_commands()) if bot is not None else 0
     })
 
 
-def run():
-    """Run the Flask server"""
+async def metrics_endpoint(request):
+    """Prometheus metrics endpoint, pide Authorization: Bearer <METRICS_TOKEN>"""
+    expected = f"Bearer {request.app['metrics_token']}"
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected.encode()):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    return web.Response(text=request.app['metrics'].export(),
+                        content_type='text/plain')
+
+
+app = web.Application()
+app.router.add_get('/', home)
+app.router.add_get('/health', health)
+app.router.add_get('/status', status)
+
+
+async def keep_alive(bot=None, working_sets=None, metrics=None):
+    """Start the aiohttp server on the running event loop (the same one as the bot)
+
+    working_sets: {nombre: función que devuelve el tamaño} reportados en /health
+    metrics: objeto con export() servido en /metrics, solo si METRICS_TOKEN está
+             definido (el puerto keep-alive es público) y con ese token
+    """
+    logger.info("🌐 Iniciando servidor keep-alive...")
+    app['bot'] = bot
+    app['gateway'] = GatewayState(bot)  # antes de bot.start(), para no perder el primer on_connect
+    app['working_sets'] = working_sets or {}
+    app['lag_monitor'] = LoopLagMonitor()
+    app['lag_task'] = asyncio.create_task(app['lag_monitor'].run())
+    if metrics is not None and os.getenv('METRICS_TOKEN'):
+        app['metrics'] = metrics
+        app['metrics_token'] = os.getenv('METRICS_TOKEN')
+        app.router.add_get('/metrics', metrics_endpoint)
+    elif metrics is not None:
+        logger.info("/metrics desactivado, define METRICS_TOKEN para exponerlo")
     port = int(os.getenv('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host='0.0.0.0', port=port)
+    await site.start()
+    logger.info(f"✅ Servidor keep-alive iniciado en puerto {port}")
+    return runner
 
 
-def keep_alive():
-    """Start the Flask server in a separate thread"""
-    print("🌐 Iniciando servidor keep-alive...")
-    t = Thread(target=run)
-    t.daemon = True
-    t.start()
-    print("✅ Servidor keep-alive iniciado en puerto 5000")
+async def stop_keep_alive(runner):
+    """Cerrar el socket y las conexiones del servidor keep-alive al apagar el bot"""
+    runner.app['lag_task'].cancel()
+    await runner.cleanup()
+    logger.info("🛑 Servidor keep-alive detenido")
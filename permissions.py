@@ -0,0 +1,96 @@
+from discord.ext import commands
+from bot_logging import get_logger
+
+logger = get_logger('permissions')
+
+# Capacidades, un bit cada una
+STAFF = 1 << 0  # comandos de administración, calificaciones, whitelist
+RADIO = 1 << 1  # crear y cerrar radios
+
+# Rol -> capacidades. Es la única configuración de permisos de todos los sistemas
+ROLE_CAPABILITIES = {
+    1221496580620816473: STAFF,  # Staff
+    1221496580570353695: RADIO,  # Rol autorizado para crear radios
+}
+
+
+def guild_roles(guild, capability):
+    """Roles de este servidor que dan la capacidad (para overwrites y menciones)"""
+    roles = (guild.get_role(role_id) for role_id, granted in ROLE_CAPABILITIES.items() if granted & capability)
+    return [role for role in roles if role is not None]
+
+
+class PermissionIndex:
+    """Índice (guild_id, member_id) -> capacidades, mantenido con los eventos de miembros y roles"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.index = {}
+        self.setup_listeners()
+
+    def setup_listeners(self):
+        """Registrar los eventos que mantienen el índice al día"""
+
+        async def member_update(before, after):
+            if before.roles != after.roles:
+                self.index[(after.guild.id, after.id)] = self.compute(after)
+
+        async def member_remove(member):
+            self.index.pop((member.guild.id, member.id), None)
+
+        async def role_delete(role):
+            # Borrar un rol no genera on_member_update, se recalcula ese servidor
+            if role.id in ROLE_CAPABILITIES:
+                self.invalidate(role.guild.id)
+
+        async def reconnected():
+            # Los eventos perdidos mientras el bot estuvo desconectado no llegan, se empieza de cero
+            self.invalidate()
+
+        # add_listener no reemplaza otros on_member_update de los sistemas ni el on_ready de app.py
+        self.bot.add_listener(member_update, 'on_member_update')
+        self.bot.add_listener(member_remove, 'on_member_remove')
+        self.bot.add_listener(role_delete, 'on_guild_role_delete')
+        self.bot.add_listener(reconnected, 'on_ready')  # cada conexión nueva, no solo la primera
+        self.bot.add_listener(reconnected, 'on_resumed')
+
+    def compute(self, member):
+        capabilities = 0
+        for role_id, capability in ROLE_CAPABILITIES.items():
+            if member.get_role(role_id) is not None:
+                capabilities |= capability
+        return capabilities
+
+    def capabilities(self, member):
+        guild = getattr(member, 'guild', None)
+        if guild is None:  # mensaje directo: discord.User no tiene roles
+            return 0
+
+        key = (guild.id, member.id)
+        if guild.get_member(member.id) is None:
+            # Solo los miembros en caché reciben on_member_update, el resto se calcula cada vez
+            self.index.pop(key, None)
+            return self.compute(member)
+
+        capabilities = self.index.get(key)
+        if capabilities is None:
+            capabilities = self.index[key] = self.compute(member)
+        return capabilities
+
+    def has(self, member, capability):
+        return (self.capabilities(member) & capability) == capability
+
+    def invalidate(self, guild_id=None):
+        if guild_id is None:
+            self.index.clear()
+        else:
+            for key in [key for key in self.index if key[0] == guild_id]:
+                del self.index[key]
+        logger.info("Índice de permisos invalidado", extra={"guild_id": guild_id})
+
+
+def require(capability):
+    """Check de comandos: el autor tiene la capacidad (ver ROLE_CAPABILITIES)"""
+    def predicate(ctx):
+        return ctx.bot.permissions.has(ctx.author, capability)
+    return commands.check(predicate)
@@ -1,13 +1,17 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import tasks
 import asyncio
 from datetime import datetime
 import json
 import os
+from bot_logging import get_logger
+from permissions import require, RADIO
+from cache_policy import ensure_chunked, get_or_fetch_member
+
+logger = get_logger('radio')
 
 # Configuración
 RADIO_CATEGORY_ID = 1221496583447908513  # Categoría donde se crearán las radios
-AUTHORIZED_ROLE_ID = 1221496580570353695  # Rol autorizado para crear radios
 
 
 class RadioSystem:
@@ -22,16 +26,8 @@ class RadioSystem:
     def setup_commands(self):
         """Configurar comandos del sistema de radio"""
 
-        def is_authorized():
-
-            def predicate(ctx):
-                return any(role.id == AUTHORIZED_ROLE_ID
-                           for role in ctx.author.roles)
-
-            return commands.check(predicate)
-
         @self.bot.command(name='radio')
-        @is_authorized()
+        @require(RADIO)
         async def radio_command(ctx, *members):
             """Crear una radio (canal de voz temporal) para el grupo"""
 
@@ -65,6 +61,7 @@ class RadioSystem:
                     role_id = int(item.replace('<@&', '').replace('>', ''))
                     role = ctx.guild.get_role(role_id)
                     if role:
+                        await ensure_chunked(ctx.guild)  # role.members necesita la lista completa
                         roles_mentioned.append(role)
                         radio_members.extend(role.members)
 
@@ -73,7 +70,7 @@ class RadioSystem:
                     user_id = int(
                         item.replace('<@!', '').replace('<@',
                                                         '').replace('>', ''))
-                    member = ctx.guild.get_member(user_id)
+                    member = await get_or_fetch_member(ctx.guild, user_id)
                     if member and member not in radio_members:
                         radio_members.append(member)
 
@@ -193,7 +190,7 @@ class RadioSystem:
                 await ctx.send(embed=embed, delete_after=15)
 
         @self.bot.command(name='cerrar-radio')
-        @is_authorized()
+        @require(RADIO)
         async def close_radio_command(ctx):
             """Cerrar manualmente la radio del usuario"""
 
@@ -236,7 +233,7 @@ class RadioSystem:
                 await ctx.send(embed=embed, delete_after=10)
 
         @self.bot.command(name='radios-activas')
-        @is_authorized()
+        @require(RADIO)
         async def active_radios_command(ctx):
             """Ver radios activas"""
 
@@ -306,11 +303,11 @@ class RadioSystem:
                         try:
                             await channel.delete()
                             to_remove.append(user_id)
-                            print(
+                            logger.info(
                                 f"📻 Radio eliminada por inactividad: {channel.name}"
                             )
                         except Exception as e:
-                            print(f"Error eliminando radio inactiva: {e}")
+                            logger.error(f"Error eliminando radio inactiva: {e}")
                 else:
                     # Actualizar última actividad
                     radio_info['last_activity'] = datetime.now()
@@ -324,12 +321,12 @@ class RadioSystem:
             if not self.active_radios:
                 self.cleanup_inactive_radios.cancel()
                 self.cleanup_task_running = False
-                print(
+                logger.info(
                     "📻 Tarea de limpieza de radios detenida - no hay radios activas"
                 )
 
         except Exception as e:
-            print(f"Error en limpieza de radios: {e}")
+            logger.error(f"Error en limpieza de radios: {e}")
 
     @cleanup_inactive_radios.before_loop
     async def before_cleanup(self):
@@ -366,4 +363,20 @@ class RadioView(discord.ui.View):
             await interaction.response.send_message("Radio cerrada exitosamente.", ephemeral=True)
 
         except Exception as e:
-            await interaction.response.send_message(f"Error al cerrar la radio: {str(e)}", ephemeral=True)
\ No newline at end of file
+            await interaction.response.send_message(f"Error al cerrar la radio: {str(e)}", ephemeral=True)
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload radio_system)"""
+    previous = bot.systems.get('radio')
+    system = RadioSystem(bot)
+    if previous is not None and previous.active_radios:  # recarga: seguir limpiando las radios abiertas
+        system.active_radios = previous.active_radios
+        system.cleanup_inactive_radios.start()
+        system.cleanup_task_running = True
+    bot.systems['radio'] = system
+    bot.add_view(RadioView(creator_id=0, radio_name="", voice_channel=None))  # Valores temporales
+
+
+async def teardown(bot):
+    bot.systems['radio'].cleanup_inactive_radios.cancel()
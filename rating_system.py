@@ -5,13 +5,16 @@ from discord.ext import commands
 from datetime import datetime
 import os
 from utils.embeds import create_error_embed, create_success_embed, create_info_embed
+from bot_logging import get_logger
+from permissions import STAFF
+
+logger = get_logger('rating')
 
 
 class RatingSystem:
 
     def __init__(self, bot):
         self.bot = bot
-        self.staff_role_id = 1221496580620816473
         self.setup_commands()
 
     def setup_commands(self):
@@ -34,9 +37,7 @@ class RatingSystem:
                     return
 
                 # Verificar que el usuario a calificar tenga el rol de staff
-                staff_role = discord.utils.get(member.roles,
-                                               id=self.staff_role_id)
-                if not staff_role:
+                if not self.bot.permissions.has(member, STAFF):
                     embed = create_error_embed(
                         "❌ Error",
                         f"{member.mention} no es miembro del staff y no puede ser calificado."
@@ -114,7 +115,7 @@ class RatingSystem:
                     "No se pudo encontrar al usuario mencionado.")
                 await ctx.send(embed=embed)
             except Exception as e:
-                print(f"Error en calificar: {e}")
+                logger.error(f"Error en calificar: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al procesar la calificación. Inténtalo de nuevo."
@@ -128,9 +129,7 @@ class RatingSystem:
 
             try:
                 # Verificar que el usuario tenga el rol de staff
-                staff_role = discord.utils.get(target_member.roles,
-                                               id=self.staff_role_id)
-                if not staff_role:
+                if not self.bot.permissions.has(target_member, STAFF):
                     embed = create_error_embed(
                         "❌ Error",
                         f"{target_member.mention} no es miembro del staff.")
@@ -202,7 +201,7 @@ class RatingSystem:
                 await ctx.send(embed=embed)
 
             except Exception as e:
-                print(f"Error en vercalificaciones: {e}")
+                logger.error(f"Error en vercalificaciones: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al obtener las calificaciones.")
@@ -258,7 +257,7 @@ class RatingSystem:
                 await ctx.send(embed=embed)
 
             except Exception as e:
-                print(f"Error en topcalificaciones: {e}")
+                logger.error(f"Error en topcalificaciones: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al obtener el ranking.")
@@ -361,3 +360,10 @@ class RatingSystem:
             return [dict(row) for row in results]
         finally:
             await conn.close()
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload rating_system)"""
+    system = RatingSystem(bot)
+    await system.init_database()
+    bot.systems['rating'] = system
@@ -108,3 +108,12 @@ class InstagramSystem:
                 return
             del self.instagram_profiles[nickname_to_delete]
             await ctx.send("✅ Tu perfil ha sido eliminado con éxito.")
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload register_instagram)"""
+    previous = bot.systems.get('instagram')
+    system = InstagramSystem(bot)
+    if previous is not None:  # recarga: conservar los perfiles registrados
+        system.instagram_profiles = previous.instagram_profiles
+    bot.systems['instagram'] = system
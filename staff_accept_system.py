@@ -2,6 +2,9 @@ import discord
 from discord.ext import commands
 from datetime import datetime
 from utils.embeds import create_error_embed, create_success_embed
+from bot_logging import get_logger
+
+logger = get_logger('staff_accept')
 
 class StaffAcceptSystem:
     def __init__(self, bot):
@@ -123,7 +126,7 @@ class StaffAcceptSystem:
                 )
                 await ctx.send(embed=embed)
             except Exception as e:
-                print(f"Error en aceptar: {e}")
+                logger.error(f"Error en aceptar: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al procesar la aceptación."
@@ -135,4 +138,9 @@ class StaffAcceptSystem:
             if isinstance(error, commands.MissingPermissions):
                 await ctx.send("❌ No tienes permisos de administrador para usar este comando.")
             elif isinstance(error, commands.MissingRequiredArgument):
-                await ctx.send("❌ Debes mencionar al usuario a aceptar. Uso: `pc!aceptar @usuario`")
\ No newline at end of file
+                await ctx.send("❌ Debes mencionar al usuario a aceptar. Uso: `pc!aceptar @usuario`")
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload staff_accept_system)"""
+    bot.systems['staff_accept'] = StaffAcceptSystem(bot)
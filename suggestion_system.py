@@ -5,6 +5,9 @@ from datetime import datetime
 import json
 import os
 from utils.embeds import create_error_embed, create_success_embed, create_info_embed
+from bot_logging import get_logger
+
+logger = get_logger('suggestion')
 
 class SuggestionSystem:
     def __init__(self, bot):
@@ -85,7 +88,7 @@ class SuggestionSystem:
                 await ctx.send(embed=embed_confirmation)
 
             except Exception as e:
-                print(f"Error en sugerencia: {e}")
+                logger.error(f"Error en sugerencia: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al procesar la sugerencia. Inténtalo de nuevo."
@@ -119,7 +122,7 @@ class SuggestionSystem:
                 json.dump(suggestions, f, indent=2, ensure_ascii=False)
 
         except Exception as e:
-            print(f"Error saving suggestion: {e}")
+            logger.error(f"Error saving suggestion: {e}")
 
 class SuggestionVotingView(discord.ui.View):
     def __init__(self, author_id):
@@ -221,5 +224,11 @@ class SuggestionVotingView(discord.ui.View):
             await interaction.followup.send(f"✅ Has {action} esta sugerencia.", ephemeral=True)
 
         except Exception as e:
-            print(f"Error handling vote: {e}")
-            await interaction.response.send_message("❌ Error al procesar el voto.", ephemeral=True)
\ No newline at end of file
+            logger.error(f"Error handling vote: {e}")
+            await interaction.response.send_message("❌ Error al procesar el voto.", ephemeral=True)
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload suggestion_system)"""
+    bot.systems['suggestion'] = SuggestionSystem(bot)
+    bot.add_view(SuggestionVotingView(author_id=0))  # vista persistente, ID temporal
@@ -0,0 +1,31 @@
+import os
+
+# Before core is imported: hash inline and cheaply, and use mongomock instead of a mongod
+os.environ.setdefault('HASH_WORKERS', '0')
+os.environ.setdefault('HASH_ITERATIONS', '1000')
+os.environ['MONGO_DB'] = 'auth_tests'
+
+import mongomock
+import pytest
+from mongoengine import get_db
+from core import db
+from core.migrate import migrate_user_indexes
+
+db.mongo_client_class = mongomock.MongoClient
+db.supports_collation = False  # mongomock cursors have no collation()
+
+
+@pytest.fixture
+def app():
+    from core import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    migrate_user_indexes(log=lambda message: None)
+    with app.test_client() as client:
+        yield client
+    database = get_db()
+    database.client.drop_database(database.name)
@@ -0,0 +1,25 @@
+import pytest
+from starlette.testclient import TestClient
+from core import asgi
+
+INVALID_REGISTRATIONS = [
+    {'username': '', 'email': 'empty@example.com', 'password': 'password'},
+    {'username': 'empty_email', 'email': '', 'password': 'password'},
+    {'username': 'empty_password', 'email': 'password@example.com', 'password': ''},
+    {'username': 'no_email', 'password': 'password'},
+]
+
+
+@pytest.fixture
+def asgi_client(client):  # client sets up the database both apps use
+    with TestClient(asgi.app) as asgi_client:
+        yield asgi_client
+
+
+@pytest.mark.parametrize('form', INVALID_REGISTRATIONS)
+def test_invalid_registrations_get_the_same_answer(client, asgi_client, form):
+    flask_response = client.post('/register', data=form)
+    asgi_response = asgi_client.post('/register', data=form)
+
+    assert flask_response.status_code == asgi_response.status_code == 400
+    assert flask_response.get_json() == asgi_response.json() == {"msg": "Missing username, password, or email"}
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import time
+import pytest
+from core.hashing import HashingExecutor, HashingBusy
+
+
+def test_timeout_is_busy_and_keeps_the_slot_until_the_hash_ends():
+    executor = HashingExecutor(workers=1, max_pending=1, timeout=0.1, iterations=1000)
+    try:
+        with pytest.raises(HashingBusy):
+            executor._run(time.sleep, 1)
+        with pytest.raises(HashingBusy):
+            executor.generate('password')  # the abandoned sleep still holds the only slot
+
+        time.sleep(1.2)
+        assert executor.generate('password').startswith('pbkdf2:sha256:1000$')
+        assert executor.stats()['timeouts'] == 1
+        assert executor.stats()['rejected'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_async_timeout_is_busy():
+    executor = HashingExecutor(workers=1, timeout=0.1, iterations=1000)
+    try:
+        with pytest.raises(HashingBusy):
+            asyncio.run(executor._run_async(time.sleep, 1))
+    finally:
+        executor.shutdown()
+
+
+def test_broken_pool_is_replaced():
+    executor = HashingExecutor(workers=1, iterations=1000)
+    try:
+        with pytest.raises(HashingBusy):
+            executor._run(os._exit, 1)  # the child dies like it would under the OOM killer
+        assert executor.generate('password').startswith('pbkdf2:sha256:1000$')
+        assert executor.generate_many(['a', 'b', 'c']) and executor.stats()['broken_pools'] == 1
+    finally:
+        executor.shutdown()
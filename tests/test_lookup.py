@@ -0,0 +1,28 @@
+from core.models.user import User
+
+
+def lookup(client, app, monkeypatch, **body):
+    monkeypatch.setitem(app.config, 'ADMIN_API_KEY', 'test-key')
+    response = client.post('/users/lookup', json=body, headers={'X-Admin-Key': 'test-key'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_username_case_variants_are_all_filled(client, app, monkeypatch):
+    assert client.post('/register', data={'username': 'lookup_bob', 'email': 'bob@example.com',
+                                          'password': 'password'}).status_code == 201
+
+    for _ in range(2):  # from the database, then from the lookup cache
+        found = lookup(client, app, monkeypatch, usernames=['lookup_bob', 'Lookup_Bob', 'nobody'])['usernames']
+        assert found['lookup_bob'] is not None and found['lookup_bob']['email'] == 'bob@example.com'
+        assert found['Lookup_Bob'] == found['lookup_bob']
+        assert found['nobody'] is None
+
+
+def test_id_spellings_are_all_filled(client, app, monkeypatch):
+    assert client.post('/register', data={'username': 'lookup_ann', 'email': 'ann@example.com',
+                                          'password': 'password'}).status_code == 201
+    user_id = str(User.objects.get(username='lookup_ann').id)  # not through the lookup, so nothing is cached
+
+    found = lookup(client, app, monkeypatch, ids=[user_id, user_id.upper()])['ids']
+    assert found[user_id] is not None and found[user_id.upper()] == found[user_id]
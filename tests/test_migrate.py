@@ -0,0 +1,23 @@
+from core.migrate import migrate_user_indexes
+from core.models.user import User
+
+
+def test_case_collisions_block_the_migration(client):
+    collection = User._get_collection()
+    collection.drop_indexes()
+    collection.create_index('username', unique=True, name='username_1')  # the old case-sensitive index
+    collection.insert_many([
+        {'username': 'Bob', 'email': 'bob@example.com'},
+        {'username': 'bob', 'email': 'other@example.com'},
+    ])
+
+    messages = []
+    assert not migrate_user_indexes(log=messages.append)
+    assert any("username 'bob' is used by 2 users" in message for message in messages)
+    assert set(collection.index_information()) == {'_id_', 'username_1'}  # left untouched
+
+    collection.update_one({'username': 'bob'}, {'$set': {'username': 'bobby'}})
+    assert migrate_user_indexes(log=messages.append)
+    indexes = collection.index_information()
+    assert 'username_1' not in indexes
+    assert {'username_ci', 'email_ci'} <= set(indexes)
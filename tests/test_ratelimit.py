@@ -0,0 +1,49 @@
+import pytest
+from starlette.requests import Request
+from werkzeug.middleware.proxy_fix import ProxyFix
+from core import asgi
+from core.ratelimit import TokenBucketLimiter, login_keys
+from core.routes import auth_routes
+
+
+def test_login_keys_ignore_username_case():
+    assert login_keys('10.0.0.1', 'Alice') == login_keys('10.0.0.1', 'aLICE') == ('ip:10.0.0.1', 'user:alice')
+
+
+def test_username_case_variants_share_one_bucket(client, monkeypatch):
+    monkeypatch.setattr(auth_routes, 'login_limiter', TokenBucketLimiter(rate=1 / 60, burst=3))
+
+    statuses = []
+    for i, username in enumerate(['alice', 'Alice', 'aLice', 'ALICE']):
+        response = client.post('/login', data={'username': username, 'password': 'wrong'},
+                               environ_base={'REMOTE_ADDR': f'10.0.0.{i}'})  # a new IP each time
+        statuses.append(response.status_code)
+
+    assert statuses == [401, 401, 401, 429]
+
+
+def test_clients_behind_a_proxy_get_their_own_ip_bucket(client, app, monkeypatch):
+    monkeypatch.setattr(auth_routes, 'login_limiter', TokenBucketLimiter(rate=1 / 60, burst=1))
+    monkeypatch.setattr(app, 'wsgi_app', ProxyFix(app.wsgi_app, x_for=1, x_proto=0))  # TRUSTED_PROXY_HOPS=1
+
+    def attempt(username, forwarded_for):
+        return client.post('/login', data={'username': username, 'password': 'wrong'},
+                           headers={'X-Forwarded-For': forwarded_for},
+                           environ_base={'REMOTE_ADDR': '10.0.0.100'}).status_code  # the proxy
+
+    assert attempt('carol', '203.0.113.1') == 401
+    assert attempt('dave', '203.0.113.2') == 401  # another client, not blocked by the first one
+    assert attempt('erin', '198.51.100.9, 203.0.113.1') == 429  # a forged first entry doesn't help
+
+
+@pytest.mark.parametrize('hops, forwarded_for, expected', [
+    (0, '203.0.113.1', '10.0.0.100'),
+    (1, '203.0.113.1', '203.0.113.1'),
+    (1, '198.51.100.9, 203.0.113.1', '203.0.113.1'),
+    (2, '203.0.113.1', '10.0.0.100'),  # fewer entries than trusted proxies, like ProxyFix
+])
+def test_asgi_client_ip_matches_proxy_fix(app, monkeypatch, hops, forwarded_for, expected):
+    monkeypatch.setitem(app.config, 'TRUSTED_PROXY_HOPS', hops)
+    request = Request({'type': 'http', 'headers': [(b'x-forwarded-for', forwarded_for.encode())],
+                       'client': ('10.0.0.100', 5000)})
+    assert asgi.client_ip(request) == expected
@@ -3,6 +3,7 @@ from discord.ext import commands
 import json
 import os
 from datetime import datetime
+from permissions import require, STAFF
 
 class WarnSystem:
     def __init__(self, bot):
@@ -12,15 +13,8 @@ class WarnSystem:
     def setup_commands(self):
         """Setup warn system commands"""
         
-        def is_staff():
-            """Check if user has staff role"""
-            def predicate(ctx):
-                staff_role_id = 1221496580620816473
-                return any(role.id == staff_role_id for role in ctx.author.roles)
-            return commands.check(predicate)
-        
         @self.bot.command(name='sancionar')
-        @is_staff()
+        @require(STAFF)
         async def warn_user(ctx, user: discord.Member, *, motivo: str):
             """Comando para agregar warns a un usuario"""
             if not motivo:
@@ -154,7 +148,7 @@ class WarnSystem:
             await ctx.send(embed=embed)
         
         @self.bot.command(name='removewarn')
-        @is_staff()
+        @require(STAFF)
         async def remove_warn(ctx, user: discord.Member, warn_id: int):
             """Comando para eliminar un warn específico"""
             warns = await self.load_warns()
@@ -217,7 +211,7 @@ class WarnSystem:
             await ctx.send(embed=embed)
         
         @self.bot.command(name='resetwarns')
-        @is_staff()
+        @require(STAFF)
         async def reset_warns(ctx, user: discord.Member):
             """Comando para eliminar todos los warns de un usuario"""
             warns = await self.load_warns()
@@ -307,4 +301,9 @@ class WarnSystem:
         """Save warns to JSON file"""
         os.makedirs('data', exist_ok=True)
         with open('data/warns.json', 'w') as f:
-            json.dump(warns, f, indent=2)
\ No newline at end of file
+            json.dump(warns, f, indent=2)
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload warn_system)"""
+    bot.systems['warn'] = WarnSystem(bot)
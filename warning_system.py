@@ -4,28 +4,25 @@ from datetime import datetime
 import json
 import os
 from utils.embeds import create_error_embed, create_success_embed, create_info_embed
+from bot_logging import get_logger
+from permissions import STAFF
+
+logger = get_logger('warning')
 
 class WarningSystem:
     def __init__(self, bot):
         self.bot = bot
-        self.staff_role_id = 1221496580620816473
         self.setup_commands()
         
     def setup_commands(self):
         """Setup warning system commands"""
         
-        def is_staff():
-            """Check if user has staff role"""
-            def predicate(ctx):
-                return any(role.id == self.staff_role_id for role in ctx.author.roles)
-            return predicate
-        
         @self.bot.command(name='advertir')
         async def warn_user(ctx, user: discord.Member, *, motivo: str):
             """Comando para agregar advertencias a un usuario"""
             try:
                 # Check if user has staff role
-                if not any(role.id == self.staff_role_id for role in ctx.author.roles):
+                if not self.bot.permissions.has(ctx.author, STAFF):
                     embed = discord.Embed(
                         title="❌ Sin Permisos",
                         description="No tienes permisos para usar este comando.",
@@ -116,7 +113,7 @@ class WarningSystem:
                 )
                 await ctx.send(embed=embed)
             except Exception as e:
-                print(f"Error en advertir: {e}")
+                logger.error(f"Error en advertir: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al procesar la advertencia."
@@ -128,7 +125,7 @@ class WarningSystem:
             """Comando para eliminar una advertencia específica"""
             try:
                 # Check if user has staff role
-                if not any(role.id == self.staff_role_id for role in ctx.author.roles):
+                if not self.bot.permissions.has(ctx.author, STAFF):
                     embed = discord.Embed(
                         title="❌ Sin Permisos",
                         description="No tienes permisos para usar este comando.",
@@ -208,14 +205,14 @@ class WarningSystem:
                     color=discord.Color.red()
                 )
                 await ctx.send(embed=embed)
-                print(f"Error removing warning: {e}")
+                logger.error(f"Error removing warning: {e}")
 
         @self.bot.command(name='veradvertencias')
         async def view_warnings(ctx, user: discord.Member):
             """Comando para ver todas las advertencias de un usuario"""
             try:
                 # Check if user has staff role
-                if not any(role.id == self.staff_role_id for role in ctx.author.roles):
+                if not self.bot.permissions.has(ctx.author, STAFF):
                     embed = discord.Embed(
                         title="❌ Sin Permisos",
                         description="No tienes permisos para usar este comando.",
@@ -274,7 +271,7 @@ class WarningSystem:
                 await ctx.send(embed=embed)
                 
             except Exception as e:
-                print(f"Error en veradvertencias: {e}")
+                logger.error(f"Error en veradvertencias: {e}")
                 embed = create_error_embed(
                     "❌ Error del sistema",
                     "Ocurrió un error al obtener las advertencias."
@@ -297,7 +294,7 @@ class WarningSystem:
                     return json.load(f)
             return {}
         except Exception as e:
-            print(f"Error loading warnings: {e}")
+            logger.error(f"Error loading warnings: {e}")
             return {}
     
     async def save_warnings(self, warnings):
@@ -307,4 +304,9 @@ class WarningSystem:
             with open('data/warnings.json', 'w', encoding='utf-8') as f:
                 json.dump(warnings, f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"Error saving warnings: {e}")
\ No newline at end of file
+            logger.error(f"Error saving warnings: {e}")
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload warning_system)"""
+    bot.systems['warning'] = WarningSystem(bot)
@@ -1,8 +1,12 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import tasks
 import asyncio
 from datetime import datetime, time, timedelta
 import pytz
+from bot_logging import get_logger
+from permissions import require, STAFF
+
+logger = get_logger('whitelist_schedule')
 
 
 class WhitelistScheduleSystem:
@@ -10,6 +14,7 @@ class WhitelistScheduleSystem:
     def __init__(self, bot):
         self.bot = bot
         self.announcement_active = False
+        self.resume_at = None  # próximo anuncio del ciclo anterior a un pc!reload
         self.setup_system()
 
     def setup_system(self):
@@ -61,7 +66,7 @@ class WhitelistScheduleSystem:
             # Obtener el canal
             channel = self.bot.get_channel(self.config['channel_id'])
             if not channel:
-                print(
+                logger.error(
                     f"❌ Canal {self.config['channel_id']} no encontrado para mensaje de whitelist"
                 )
                 return
@@ -71,11 +76,11 @@ class WhitelistScheduleSystem:
 
             # Enviar el mensaje
             await channel.send(embed=embed)
-            print(
+            logger.info(
                 f"✅ Anuncio automático de whitelist enviado a {channel.name} (cada 4 horas)")
 
         except Exception as e:
-            print(f"❌ Error enviando anuncio automático de whitelist: {e}")
+            logger.error(f"❌ Error enviando anuncio automático de whitelist: {e}")
 
     async def create_announcement_embed(self):
         """Crear el embed del anuncio"""
@@ -142,32 +147,43 @@ class WhitelistScheduleSystem:
                 inline=False)
             
             await channel.send(embed=embed)
-            print(f"✅ Anuncio inicial enviado a {channel.name}")
+            logger.info(f"✅ Anuncio inicial enviado a {channel.name}")
             
             # Activar los anuncios automáticos
             self.announcement_active = True
             if not self.automatic_announcements.is_running():
                 self.automatic_announcements.start()
-                print("✅ Sistema de anuncios cada 4 horas iniciado")
+                logger.info("✅ Sistema de anuncios cada 4 horas iniciado")
             
         except Exception as e:
-            print(f"❌ Error enviando anuncio inicial: {e}")
+            logger.error(f"❌ Error enviando anuncio inicial: {e}")
 
     def stop_announcements(self):
         """Detener los anuncios automáticos"""
         self.announcement_active = False
         if self.automatic_announcements.is_running():
             self.automatic_announcements.cancel()
-            print("🛑 Anuncios automáticos de whitelist detenidos")
+            logger.info("🛑 Anuncios automáticos de whitelist detenidos")
+
+    def resume_announcements(self, resume_at):
+        """Reanudar tras una recarga, el primer anuncio sale cuando tocaba en el ciclo anterior"""
+        self.announcement_active = True
+        self.resume_at = resume_at
+        if not self.automatic_announcements.is_running():
+            self.automatic_announcements.start()
+            logger.info("✅ Anuncios automáticos reanudados tras la recarga", extra={"resume_at": str(resume_at)})
 
     @automatic_announcements.before_loop
     async def before_automatic_announcements(self):
         """Esperar hasta que el bot esté listo"""
         await self.bot.wait_until_ready()
+        if self.resume_at is not None:
+            await discord.utils.sleep_until(self.resume_at)
+            self.resume_at = None
 
     def start_schedule_system(self):
         """Este método ya no inicia automáticamente el sistema"""
-        print("✅ Sistema de anuncios configurado - Use pc!anuncio para activar")
+        logger.info("✅ Sistema de anuncios configurado - Use pc!anuncio para activar")
 
     # Métodos para modificar la configuración fácilmente
     def update_schedule_config(self, **kwargs):
@@ -175,47 +191,40 @@ class WhitelistScheduleSystem:
         for key, value in kwargs.items():
             if key in self.config:
                 self.config[key] = value
-                print(f"✅ Configuración actualizada: {key} = {value}")
+                logger.info(f"✅ Configuración actualizada: {key} = {value}")
             else:
-                print(f"⚠️ Clave de configuración no reconocida: {key}")
+                logger.warning(f"⚠️ Clave de configuración no reconocida: {key}")
 
     def update_weekday_hours(self, start_time, end_time):
         """Actualizar horarios de días de semana"""
         self.config['weekday_hours']['start'] = start_time
         self.config['weekday_hours']['end'] = end_time
-        print(f"✅ Horarios de semana actualizados: {start_time} - {end_time}")
+        logger.info(f"✅ Horarios de semana actualizados: {start_time} - {end_time}")
 
     def update_weekend_hours(self, start_time, end_time):
         """Actualizar horarios de fin de semana"""
         self.config['weekend_hours']['start'] = start_time
         self.config['weekend_hours']['end'] = end_time
-        print(
+        logger.info(
             f"✅ Horarios de fin de semana actualizados: {start_time} - {end_time}"
         )
 
     def update_channel(self, channel_id):
         """Cambiar canal donde se envían los mensajes"""
         self.config['channel_id'] = channel_id
-        print(f"✅ Canal actualizado: {channel_id}")
+        logger.info(f"✅ Canal actualizado: {channel_id}")
 
     def manual_send_message(self):
         """Enviar mensaje manualmente (para pruebas)"""
         asyncio.create_task(self.daily_whitelist_reminder())
-        print("🔄 Enviando mensaje manual...")
+        logger.info("🔄 Enviando mensaje manual...")
 
     # Comandos para el staff para controlar el sistema
     def setup_staff_commands(self):
         """Configurar comandos para el staff"""
 
-        def is_staff():
-            def predicate(ctx):
-                staff_role_id = 1221496580620816473
-                return any(role.id == staff_role_id
-                           for role in ctx.author.roles)
-            return commands.check(predicate)
-
         @self.bot.command(name='anuncio')
-        @is_staff()
+        @require(STAFF)
         async def start_announcements(ctx):
             """Iniciar sistema de anuncios automáticos cada 4 horas"""
             try:
@@ -251,7 +260,7 @@ class WhitelistScheduleSystem:
                 await ctx.send(f"❌ Error iniciando anuncios: {e}")
 
         @self.bot.command(name='parar-anuncios')
-        @is_staff()
+        @require(STAFF)
         async def stop_announcements_command(ctx):
             """Detener los anuncios automáticos"""
             try:
@@ -282,7 +291,7 @@ class WhitelistScheduleSystem:
                 await ctx.send(f"❌ Error deteniendo anuncios: {e}")
 
         @self.bot.command(name='estado-anuncios')
-        @is_staff()
+        @require(STAFF)
         async def announcement_status(ctx):
             """Ver estado del sistema de anuncios"""
             try:
@@ -325,7 +334,7 @@ class WhitelistScheduleSystem:
                 await ctx.send(f"❌ Error obteniendo estado: {e}")
 
         @self.bot.command(name='anuncio-manual')
-        @is_staff()
+        @require(STAFF)
         async def manual_announcement(ctx):
             """Enviar un anuncio manual sin afectar el sistema automático"""
             try:
@@ -338,7 +347,26 @@ class WhitelistScheduleSystem:
                     inline=False)
                 
                 await ctx.send(embed=embed)
-                print(f"✅ Anuncio manual enviado por {ctx.author}")
+                logger.info(f"✅ Anuncio manual enviado por {ctx.author}")
                 
             except Exception as e:
                 await ctx.send(f"❌ Error enviando anuncio manual: {e}")
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload whitelist_schedule_system)"""
+    previous = bot.systems.get('whitelist_schedule')
+    system = WhitelistScheduleSystem(bot)
+    if previous is not None:  # recarga: conservar cambios hechos con update_*() y el ciclo activo
+        system.config = previous.config
+        if previous.announcement_active:
+            system.resume_announcements(previous.resume_at)
+    bot.systems['whitelist_schedule'] = system
+
+
+async def teardown(bot):
+    # El ciclo de la versión anterior se detiene; announcement_active se conserva para que
+    # setup() lo reanude en la nueva versión a la hora en que tocaba el siguiente anuncio
+    system = bot.systems['whitelist_schedule']
+    system.resume_at = system.automatic_announcements.next_iteration or system.resume_at
+    system.automatic_announcements.cancel()
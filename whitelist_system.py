@@ -5,10 +5,14 @@ import os
 import asyncio
 import aiohttp
 from datetime import datetime
+from bot_logging import get_logger
+from permissions import require, guild_roles, STAFF
+from cache_policy import get_or_fetch_member
+
+logger = get_logger('whitelist')
 
 # Configuration
 WHITELIST_CATEGORY_ID = 1386906933272907816
-STAFF_ROLE_ID = 1221496580620816473
 RESULTS_CHANNEL_ID = 1221496581828776049
 
 class WhitelistSystem:
@@ -21,11 +25,6 @@ class WhitelistSystem:
     def setup_commands(self):
         """Setup whitelist commands"""
         
-        def is_staff():
-            def predicate(ctx):
-                return any(role.id == STAFF_ROLE_ID for role in ctx.author.roles)
-            return commands.check(predicate)
-
         @self.bot.command(name='whitelist')
         async def whitelist_command(ctx):
             """Comando para crear canal de whitelist con vinculación de Roblox"""
@@ -48,8 +47,8 @@ class WhitelistSystem:
                 return
 
             # Get staff role
-            staff_role = ctx.guild.get_role(STAFF_ROLE_ID)
-            if not staff_role:
+            staff_roles = guild_roles(ctx.guild, STAFF)
+            if not staff_roles:
                 await ctx.send("❌ Error: No se encontró el rol de staff.")
                 return
 
@@ -59,7 +58,7 @@ class WhitelistSystem:
                 overwrites = {
                     ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False),
                     ctx.author: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                    staff_role: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+                    **{role: discord.PermissionOverwrite(read_messages=True, send_messages=True) for role in staff_roles}
                 }
 
                 channel = await ctx.guild.create_text_channel(
@@ -78,7 +77,7 @@ class WhitelistSystem:
                 await ctx.send(f"❌ Error al crear el canal: {str(e)}")
 
         @self.bot.command(name='reset-whitelist')
-        @is_staff()
+        @require(STAFF)
         async def reset_whitelist_command(ctx, user: discord.Member):
             """Comando para resetear completamente la whitelist de un usuario"""
             try:
@@ -197,8 +196,8 @@ class WhitelistSystem:
                 return
 
             # Get staff role
-            staff_role = ctx.guild.get_role(STAFF_ROLE_ID)
-            if not staff_role:
+            staff_roles = guild_roles(ctx.guild, STAFF)
+            if not staff_roles:
                 await ctx.send("❌ Error: No se encontró el rol de staff.")
                 return
 
@@ -208,7 +207,7 @@ class WhitelistSystem:
                 overwrites = {
                     ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False),
                     ctx.author: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-                    staff_role: discord.PermissionOverwrite(read_messages=True, send_messages=True)
+                    **{role: discord.PermissionOverwrite(read_messages=True, send_messages=True) for role in staff_roles}
                 }
 
                 channel = await ctx.guild.create_text_channel(
@@ -344,7 +343,7 @@ class WhitelistSystem:
                 # Get user and send timeout message (with error handling)
                 user = None
                 try:
-                    user = channel.guild.get_member(user_id)
+                    user = await get_or_fetch_member(channel.guild, user_id)
                 except:
                     pass
                 
@@ -407,26 +406,26 @@ class WhitelistSystem:
                             
                             await user.send(embed=dm_embed)
                         except discord.Forbidden:
-                            print(f"No se pudo enviar DM a {user.name} - DMs cerrados")
+                            logger.warning(f"No se pudo enviar DM a {user.name} - DMs cerrados")
                         except Exception as dm_error:
-                            print(f"Error enviando DM: {dm_error}")
+                            logger.error(f"Error enviando DM: {dm_error}")
                     
                     except discord.NotFound:
-                        print(f"Canal de whitelist ya no existe para usuario {user_id}")
+                        logger.warning(f"Canal de whitelist ya no existe para usuario {user_id}")
                     except Exception as channel_error:
-                        print(f"Error enviando mensaje de timeout: {channel_error}")
+                        logger.error(f"Error enviando mensaje de timeout: {channel_error}")
                 
                 # Delete channel after 10 seconds (with error handling)
                 await asyncio.sleep(10)
                 try:
                     await channel.delete()
                 except discord.NotFound:
-                    print(f"Canal ya fue eliminado para usuario {user_id}")
+                    logger.warning(f"Canal ya fue eliminado para usuario {user_id}")
                 except Exception as delete_error:
-                    print(f"Error eliminando canal: {delete_error}")
+                    logger.error(f"Error eliminando canal: {delete_error}")
                 
         except Exception as e:
-            print(f"Error en timeout de verificación: {e}")
+            logger.error(f"Error en timeout de verificación: {e}")
 
     async def verify_roblox_account(self, interaction, roblox_username):
         """Verify Roblox account by checking description"""
@@ -480,7 +479,7 @@ class WhitelistSystem:
 
         except Exception as e:
             await interaction.response.send_message(f"❌ Error durante la verificación: {str(e)}", ephemeral=True)
-            print(f"Error en verificación de Roblox: {e}")
+            logger.error(f"Error en verificación de Roblox: {e}")
 
     async def get_roblox_user_data(self, username):
         """Get Roblox user data from API"""
@@ -522,7 +521,7 @@ class WhitelistSystem:
                 return user_data
 
         except Exception as e:
-            print(f"Error obteniendo datos de Roblox: {e}")
+            logger.error(f"Error obteniendo datos de Roblox: {e}")
             return None
 
     async def start_questionnaire_with_roblox_data(self, user, channel, roblox_data):
@@ -596,7 +595,7 @@ class WhitelistSystem:
 
         except Exception as e:
             await channel.send(f"❌ Error iniciando cuestionario: {str(e)}")
-            print(f"Error en cuestionario: {e}")
+            logger.error(f"Error en cuestionario: {e}")
 
     async def ask_questions(self, user, channel, roblox_info):
         """Ask whitelist questions"""
@@ -737,8 +736,7 @@ class WhitelistSystem:
                 view = WhitelistReviewView(user.id, channel.id, self, roblox_info)
 
                 # Send to staff
-                staff_role = channel.guild.get_role(STAFF_ROLE_ID)
-                staff_mention = staff_role.mention if staff_role else "@Staff"
+                staff_mention = " ".join(role.mention for role in guild_roles(channel.guild, STAFF)) or "@Staff"
 
                 await channel.send(
                     f"{staff_mention} Nueva solicitud de whitelist:",
@@ -1068,8 +1066,7 @@ class WhitelistSystem:
                 view = WhitelistReviewView(user.id, channel.id, self, roblox_info)
 
                 # Send to staff
-                staff_role = channel.guild.get_role(STAFF_ROLE_ID)
-                staff_mention = staff_role.mention if staff_role else "@Staff"
+                staff_mention = " ".join(role.mention for role in guild_roles(channel.guild, STAFF)) or "@Staff"
 
                 await channel.send(
                     f"{staff_mention} Solicitud de whitelist con evaluación completa:",
@@ -1113,10 +1110,10 @@ class WhitelistSystem:
             with open('data/whitelist_applications.json', 'w', encoding='utf-8') as f:
                 json.dump(applications, f, indent=2, ensure_ascii=False)
 
-            print(f"✅ Datos de whitelist guardados para usuario {user_id}")
+            logger.info(f"✅ Datos de whitelist guardados para usuario {user_id}")
 
         except Exception as e:
-            print(f"Error saving application data: {e}")
+            logger.error(f"Error saving application data: {e}")
 
     async def has_whitelist_history(self, user_id):
         """Check if user has already completed whitelist process"""
@@ -1135,7 +1132,7 @@ class WhitelistSystem:
 
             return False
         except Exception as e:
-            print(f"Error checking whitelist history: {e}")
+            logger.error(f"Error checking whitelist history: {e}")
             return False
 
     def remove_user_channel(self, user_id):
@@ -1222,12 +1219,12 @@ class WhitelistSystem:
                            icon_url=user.guild.icon.url if user.guild and user.guild.icon else None)
             
             await user.send(embed=embed)
-            print(f"✅ DM de reset enviado a {user.name}")
+            logger.info(f"✅ DM de reset enviado a {user.name}")
             
         except discord.Forbidden:
-            print(f"❌ No se pudo enviar DM a {user.name} - DMs cerrados")
+            logger.error(f"❌ No se pudo enviar DM a {user.name} - DMs cerrados")
         except Exception as e:
-            print(f"❌ Error enviando DM de reset: {e}")
+            logger.error(f"❌ Error enviando DM de reset: {e}")
 
     async def auto_approve_whitelist(self, user, channel, roblox_info, answers, original_embed):
         """Auto-approve whitelist and handle all processes"""
@@ -1263,7 +1260,7 @@ class WhitelistSystem:
                 if hasattr(historial_user, 'register_new_whitelist_user'):
                     await historial_user.register_new_whitelist_user(user.id, answers)
             except Exception as e:
-                print(f"Error registrando usuario en historial: {e}")
+                logger.error(f"Error registrando usuario en historial: {e}")
             
             # Update application status
             await self.update_application_status_auto(user.id)
@@ -1315,7 +1312,7 @@ class WhitelistSystem:
                 pass
                 
         except Exception as e:
-            print(f"Error en aprobación automática: {e}")
+            logger.error(f"Error en aprobación automática: {e}")
     
     async def assign_whitelist_roles_auto(self, user, roblox_info=None):
         """Assign roles for auto-approved whitelist"""
@@ -1342,7 +1339,7 @@ class WhitelistSystem:
                     try:
                         await user.add_roles(role, reason="Whitelist auto-approved by AutoMod")
                     except Exception as e:
-                        print(f"Error adding role {role.name}: {e}")
+                        logger.error(f"Error adding role {role.name}: {e}")
 
             # Remove roles
             for role_id in roles_to_remove:
@@ -1351,14 +1348,14 @@ class WhitelistSystem:
                     try:
                         await user.remove_roles(role, reason="Whitelist auto-approved by AutoMod")
                     except Exception as e:
-                        print(f"Error removing role {role.name}: {e}")
+                        logger.error(f"Error removing role {role.name}: {e}")
 
             # Change user nickname to Discord | Roblox format
             if roblox_info:
                 await self.change_user_nickname(user, roblox_info)
 
         except Exception as e:
-            print(f"Error managing roles auto: {e}")
+            logger.error(f"Error managing roles auto: {e}")
 
     async def change_user_nickname(self, user, roblox_info):
         """Change user nickname to Discord | Roblox format"""
@@ -1382,12 +1379,12 @@ class WhitelistSystem:
             
             # Change nickname
             await user.edit(nick=new_nickname, reason="Whitelist approved - Auto nickname update")
-            print(f"✅ Nickname cambiado para {user.name}: {new_nickname}")
+            logger.info(f"✅ Nickname cambiado para {user.name}: {new_nickname}")
             
         except discord.Forbidden:
-            print(f"❌ No se pudo cambiar el nickname de {user.name} - Sin permisos")
+            logger.error(f"❌ No se pudo cambiar el nickname de {user.name} - Sin permisos")
         except Exception as e:
-            print(f"❌ Error cambiando nickname de {user.name}: {e}")
+            logger.error(f"❌ Error cambiando nickname de {user.name}: {e}")
     
     async def log_auto_approval(self, guild, user, roblox_info, answers):
         """Log auto-approval with detailed answers"""
@@ -1397,7 +1394,7 @@ class WhitelistSystem:
             log_channel = guild.get_channel(LOG_CHANNEL_ID)
             
             if not log_channel:
-                print(f"❌ Canal de logs {LOG_CHANNEL_ID} no encontrado")
+                logger.error(f"❌ Canal de logs {LOG_CHANNEL_ID} no encontrado")
                 return
             
             embed = discord.Embed(
@@ -1463,10 +1460,10 @@ class WhitelistSystem:
             embed.set_footer(text="Puro Chile RP - Log AutoMod")
             
             await log_channel.send(embed=embed)
-            print(f"✅ Log de aprobación automática registrado para {user.name}")
+            logger.info(f"✅ Log de aprobación automática registrado para {user.name}")
             
         except Exception as e:
-            print(f"❌ Error registrando log de aprobación automática: {e}")
+            logger.error(f"❌ Error registrando log de aprobación automática: {e}")
     
     async def update_application_status_auto(self, user_id):
         """Update application status for auto-approval"""
@@ -1484,7 +1481,7 @@ class WhitelistSystem:
                     with open('data/whitelist_applications.json', 'w', encoding='utf-8') as f:
                         json.dump(applications, f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"Error updating auto status: {e}")
+            logger.error(f"Error updating auto status: {e}")
 
     async def log_whitelist_reset(self, guild, user, staff_member, user_data, channel_deleted):
         """Log whitelist reset action to designated channel"""
@@ -1494,7 +1491,7 @@ class WhitelistSystem:
             log_channel = guild.get_channel(LOG_CHANNEL_ID)
             
             if not log_channel:
-                print(f"❌ Canal de logs {LOG_CHANNEL_ID} no encontrado")
+                logger.error(f"❌ Canal de logs {LOG_CHANNEL_ID} no encontrado")
                 return
             
             embed = discord.Embed(
@@ -1560,10 +1557,10 @@ class WhitelistSystem:
             embed.set_footer(text="Puro Chile RP - Log de Reset de Whitelist")
             
             await log_channel.send(embed=embed)
-            print(f"✅ Log de reset registrado para {user.name}")
+            logger.info(f"✅ Log de reset registrado para {user.name}")
             
         except Exception as e:
-            print(f"❌ Error registrando log de reset: {e}")
+            logger.error(f"❌ Error registrando log de reset: {e}")
 
 
 class RobloxVerificationView(discord.ui.View):
@@ -1609,7 +1606,7 @@ class WhitelistReviewView(discord.ui.View):
 
     @discord.ui.button(label='✅ Aceptar Whitelist', style=discord.ButtonStyle.success, custom_id='approve_whitelist')
     async def approve_whitelist(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if STAFF_ROLE_ID not in [role.id for role in interaction.user.roles]:
+        if not interaction.client.permissions.has(interaction.user, STAFF):
             await interaction.response.send_message("❌ Solo el staff puede usar este botón.", ephemeral=True)
             return
 
@@ -1617,7 +1614,7 @@ class WhitelistReviewView(discord.ui.View):
 
     @discord.ui.button(label='❌ Rechazar Whitelist', style=discord.ButtonStyle.danger, custom_id='reject_whitelist')
     async def reject_whitelist(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if STAFF_ROLE_ID not in [role.id for role in interaction.user.roles]:
+        if not interaction.client.permissions.has(interaction.user, STAFF):
             await interaction.response.send_message("❌ Solo el staff puede usar este botón.", ephemeral=True)
             return
 
@@ -1626,7 +1623,7 @@ class WhitelistReviewView(discord.ui.View):
     async def process_decision(self, interaction, decision):
         """Process whitelist decision"""
         try:
-            user = interaction.guild.get_member(self.user_id)
+            user = await get_or_fetch_member(interaction.guild, self.user_id)
             results_channel = interaction.guild.get_channel(RESULTS_CHANNEL_ID)
 
             if not user or not results_channel:
@@ -1693,7 +1690,7 @@ class WhitelistReviewView(discord.ui.View):
                         answers = user_data.get('answers', [])
                         await historial_user.register_new_whitelist_user(self.user_id, answers)
                 except Exception as e:
-                    print(f"Error registrando usuario en historial: {e}")
+                    logger.error(f"Error registrando usuario en historial: {e}")
 
             # Disable buttons
             for item in self.children:
@@ -1721,7 +1718,7 @@ class WhitelistReviewView(discord.ui.View):
                     await interaction.followup.send(f"❌ Error procesando decisión: {str(e)}", ephemeral=True)
                 except:
                     pass
-            print(f"Error en decisión de whitelist: {e}")
+            logger.error(f"Error en decisión de whitelist: {e}")
 
     async def assign_whitelist_roles(self, interaction, user):
         """Assign roles when whitelist is approved"""
@@ -1748,9 +1745,9 @@ class WhitelistReviewView(discord.ui.View):
                     try:
                         await user.add_roles(role, reason="Whitelist approved")
                     except discord.Forbidden:
-                        print(f"No permission to add role {role.name}")
+                        logger.warning(f"No permission to add role {role.name}")
                     except Exception as e:
-                        print(f"Error adding role {role.name}: {e}")
+                        logger.error(f"Error adding role {role.name}: {e}")
 
             # Remove roles
             for role_id in roles_to_remove:
@@ -1759,15 +1756,15 @@ class WhitelistReviewView(discord.ui.View):
                     try:
                         await user.remove_roles(role, reason="Whitelist approved")
                     except discord.Forbidden:
-                        print(f"No permission to remove role {role.name}")
+                        logger.warning(f"No permission to remove role {role.name}")
                     except Exception as e:
-                        print(f"Error removing role {role.name}: {e}")
+                        logger.error(f"Error removing role {role.name}: {e}")
 
             # Change user nickname to Discord | Roblox format
             await self.change_user_nickname(user, self.roblox_info)
 
         except Exception as e:
-            print(f"Error managing roles: {e}")
+            logger.error(f"Error managing roles: {e}")
 
     async def update_application_status(self, status, decided_by):
         """Update application status"""
@@ -1784,7 +1781,7 @@ class WhitelistReviewView(discord.ui.View):
                     with open('data/whitelist_applications.json', 'w', encoding='utf-8') as f:
                         json.dump(applications, f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"Error updating status: {e}")
+            logger.error(f"Error updating status: {e}")
 
     async def cleanup_channel(self, interaction):
         """Clean up channel"""
@@ -1794,4 +1791,22 @@ class WhitelistReviewView(discord.ui.View):
             if channel:
                 await channel.delete()
         except Exception as e:
-            print(f"Error cleaning up channel: {e}")
+            logger.error(f"Error cleaning up channel: {e}")
+
+
+async def setup(bot):
+    """Punto de entrada de la extensión (pc!reload whitelist_system)"""
+    previous = bot.systems.get('whitelist')
+    system = WhitelistSystem(bot)
+    if previous is not None:  # recarga: conservar los canales y verificaciones en curso
+        system.user_channels = previous.user_channels
+        system.pending_verifications = previous.pending_verifications
+    bot.systems['whitelist'] = system
+
+    # Vistas persistentes, las nuevas reemplazan a las de la versión anterior
+    bot.add_view(RobloxVerificationView(user_id=0, whitelist_system=system))  # ID temporal
+    bot.add_view(
+        WhitelistReviewView(user_id=0,
+                            channel_id=0,
+                            whitelist_system=system,
+                            roblox_info={}))  # Valores temporales